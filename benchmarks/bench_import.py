@@ -0,0 +1,60 @@
+'''
+.. module: bench_import
+
+Import-time benchmark: measures the time to import journal in fresh
+processes, with the optional heavy modules (matplotlib, dateutil, colorama)
+loaded lazily (default) and imported eagerly as they used to be.
+
+Usage (from the root of the repository):
+    python benchmarks/bench_import.py [repeats]
+'''
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+_SCRIPT = '''
+import sys, time
+sys.path.insert(0, {root!r})
+tic = time.time()
+import journal
+{extra}
+sys.stdout.write('{{0}} {{1}}'.format(time.time()-tic,
+                                     'matplotlib' in sys.modules))
+'''
+
+_EAGER = '''
+import matplotlib.pyplot, dateutil.parser
+try:
+    import colorama
+except ImportError:
+    pass
+'''
+
+def run(extra, repeats):
+    '''
+    Returns the median import time (in seconds) over repeats fresh
+    interpreters and whether matplotlib was loaded
+    '''
+    script = _SCRIPT.format(root=ROOT, extra=extra)
+    times = []
+    for _ in range(repeats):
+        out = subprocess.check_output([sys.executable, '-c', script])
+        elapsed, loaded = out.split()
+        times.append(float(elapsed))
+    return sorted(times)[len(times)//2], loaded == 'True'
+
+def main():
+    '''
+    Prints the median import times of the lazy and eager imports
+    '''
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 11
+    print '{0:>8} {1:>12} {2:>12}'.format('imports', 'time (ms)',
+                                           'matplotlib')
+    for name, extra in [('lazy', ''), ('eager', _EAGER)]:
+        elapsed, loaded = run(extra, repeats)
+        print '{0:>8} {1:>12.1f} {2:>12}'.format(name, elapsed*1000, str(loaded))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+'''
+.. module: bench_shared_logger
+
+Stress benchmark of shared loggers: several processes log to the same file
+and the aggregate number of lines per second is reported for an increasing
+number of writer processes. The file is then checked for interleaved lines.
+
+Usage (from the root of the repository):
+    python benchmarks/bench_shared_logger.py [max_processes] [lines] [buffer_size]
+'''
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+import journal
+
+def _writer(logdir, nlines, buffer_size, start):
+    '''
+    Writes nlines lines to the shared log file, once start is set
+    '''
+    log = journal.Logger('Bench', logdir=logdir, shared=True,
+                         buffered=buffer_size > 1, buffer_size=buffer_size,
+                         headers=['pid', 'count', 'value'])
+    pid = os.getpid()
+    start.wait()
+    for j in range(nlines):
+        log.log(pid, j, j*0.5)
+    log.close()
+
+def _check(logdir, nprocs, nlines):
+    '''
+    Checks that the file has one header and complete lines
+    '''
+    day = os.listdir(logdir)[0]
+    fname = os.path.join(logdir, day, 'Bench_'+day+'.txt')
+    with open(fname) as fil:
+        lines = fil.read().splitlines()
+    assert lines[0] == 'time,pid,count,value', 'bad header'
+    assert len(lines) == nprocs*nlines+1, 'missing lines'
+    for line in lines[1:]:
+        _, _, count, value = line.split(',')
+        assert float(value) == int(count)*0.5, 'interleaved line'
+
+def run(nprocs, nlines, buffer_size):
+    '''
+    Runs nprocs writers and returns the aggregate number of lines per second
+    '''
+    logdir = tempfile.mkdtemp()
+    try:
+        start = multiprocessing.Event()
+        procs = [multiprocessing.Process(target=_writer,
+                                         args=(logdir, nlines, buffer_size,
+                                               start))
+                 for _ in range(nprocs)]
+        for proc in procs:
+            proc.start()
+        time.sleep(0.5)
+        tic = time.time()
+        start.set()
+        for proc in procs:
+            proc.join()
+        elapsed = time.time()-tic
+        _check(logdir, nprocs, nlines)
+    finally:
+        shutil.rmtree(logdir)
+    return nprocs*nlines/elapsed
+
+def main():
+    '''
+    Prints the aggregate throughput for 1 to max_processes writers
+    '''
+    maxprocs = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    nlines = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    buffer_size = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    print 'buffer size: {0}, lines per process: {1}'.format(buffer_size,
+                                                            nlines)
+    print '{0:>10} {1:>15}'.format('processes', 'lines/s')
+    nprocs = 1
+    while nprocs <= maxprocs:
+        print '{0:>10} {1:>15.0f}'.format(nprocs,
+                                          run(nprocs, nlines, buffer_size))
+        nprocs *= 2
+
+if __name__ == '__main__':
+    main()
@@ -9,14 +9,69 @@ __version__ = '1.1'
 
 
 import numpy as _numpy
-import matplotlib.pyplot as _plt
 import pickle as _pickle
+import json as _json
+import gzip as _gzip
+import shutil as _shutil
+import struct as _struct
+import re as _re
 import datetime as _dt
+import time as _time
+import threading as _threading
+import Queue as _Queue
+import mmap as _mmap
+import multiprocessing as _multiprocessing
+import os as _os
+import importlib as _importlib
+import itertools as _itertools
+import ast as _ast
+import operator as _operator
+
+class _LazyModule(object):
+    '''
+    Module imported on first attribute access (matplotlib takes hundreds of
+    milliseconds to import and probes the GUI backends). A lazy optional
+    module is false if it is not installed.
+    '''
+    def __init__(self, name, optional=False):
+        self._name = name
+        self._optional = optional
+        self._module = None
+
+    def _load(self):
+        '''
+        Imports the module (None if optional and not installed)
+        '''
+        if self._module is None:
+            try:
+                self._module = _importlib.import_module(self._name)
+            except ImportError:
+                if not self._optional:
+                    raise
+                self._module = False
+        return self._module or None
+
+    def __getattr__(self, attr):
+        module = self._load()
+        if module is None:
+            raise AttributeError(attr)
+        return getattr(module, attr)
+
+    def __nonzero__(self):
+        return self._load() is not None
+
+_plt = _LazyModule('matplotlib.pyplot')
+_colorama = _LazyModule('colorama', optional=True)
+
+try:
+    import fcntl as _fcntl
+except ImportError:
+    _fcntl = None
 
 try:
-    import colorama as _colorama
+    from select import PIPE_BUF as _PIPE_BUF
 except ImportError:
-    _colorama = None
+    _PIPE_BUF = 512
 
 def _date2jd(date):
     '''
@@ -43,6 +98,359 @@ def _date2jd(date):
                    367*(mth -2 -leap*12)/12 -
                    3 *(year + 4900 + leap)/400) + thour/24
 
+_STAMP_DTYPE = 'datetime64[us]'
+_DELTA_DTYPE = 'timedelta64[us]'
+_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+# Value returned by _date2jd for 1970-01-01 00:00:00
+_JD_UNIX_EPOCH = 2440588.
+# Number of rows pulled at once from the columns when iterating over rows
+_ROW_CHUNK = 10000
+# Query engine (DataMatrix.query): number of rows evaluated at once and
+# maximal number of compiled expressions kept in the cache
+_QUERY_CHUNK = 1 << 16
+_QUERY_CACHE_SIZE = 256
+# int64 value of numpy.datetime64('NaT')
+_NAT = _numpy.iinfo(_numpy.int64).min
+# Versions of the time stamps of the TimeColumns (see DataMatrix time index)
+_STAMP_VERSIONS = _itertools.count(1)
+
+def _date2stamp(date):
+    '''
+    Returns a numpy.datetime64 (in micro-seconds) from a datetime object.
+    Timezone-aware datetime objects are converted to UTC.
+
+    Args:
+        date (datetime.datetime object): the date to transform
+    '''
+    offset = date.utcoffset()
+    if offset is not None:
+        date = date.replace(tzinfo=None) - offset
+    return _numpy.datetime64(date, 'us')
+
+def _rule2us(rule):
+    '''
+    Returns the width in micro-seconds of a resampling rule
+
+    Args:
+        rule (str, number, datetime.timedelta or numpy.timedelta64): a
+            string like '10s', '1min', '500ms', '2h' or '1d' (units: us, ms,
+            s, min, h, d), or a number of seconds
+
+    Raises:
+        ValueError
+    '''
+    if isinstance(rule, _dt.timedelta):
+        width = (rule.days*86400 + rule.seconds)*1000000 + rule.microseconds
+    elif isinstance(rule, _numpy.timedelta64):
+        width = rule.astype(_DELTA_DTYPE).astype(_numpy.int64)
+    elif isinstance(rule, str):
+        match = _re.match(r'^\s*(\d+(?:\.\d*)?)\s*([a-z]+)\s*$', rule)
+        if match is None or match.group(2) not in _RULE_UNITS:
+            raise ValueError('Unknown resampling rule {0}'.format(rule))
+        width = float(match.group(1))*_RULE_UNITS[match.group(2)]
+    else:
+        width = rule*1e6
+    width = int(round(width))
+    if width <= 0:
+        raise ValueError('The resampling rule must be positive')
+    return width
+
+def _date2us(date):
+    '''
+    Returns the number of micro-seconds since 1970-01-01 from a datetime
+    object. Timezone-aware datetime objects are converted to UTC.
+
+    Args:
+        date (datetime.datetime object): the date to transform
+    '''
+    offset = date.utcoffset()
+    if offset is not None:
+        date = date.replace(tzinfo=None) - offset
+    delta = date - _dt.datetime(1970, 1, 1)
+    return (delta.days*86400 + delta.seconds)*1000000 + delta.microseconds
+
+def _stamps2str(stamps):
+    '''
+    Returns an array of strings (format _TIME_FORMAT) from an array of
+    numpy.datetime64
+
+    Args:
+        stamps (numpy.ndarray): the datetime64 values to transform
+    '''
+    return _numpy.datetime_as_string(stamps, unit='us').astype(str)
+
+def _as_micro(stamps):
+    '''
+    Returns an int64 array of micro-seconds since 1970-01-01 from an array
+    of datetime64 or of int64 micro-seconds
+    '''
+    stamps = _numpy.asarray(stamps)
+    if stamps.dtype.kind == 'M':
+        return stamps.astype(_STAMP_DTYPE).view(_numpy.int64)
+    return stamps.astype(_numpy.int64)
+
+def _split_micro(values, unit):
+    '''
+    Converts an array of floats counted in `unit` micro-seconds into int64
+    micro-seconds, rounding the fractional parts separately so that large
+    values keep their micro-second accuracy. NaNs become NaT.
+    '''
+    values = _numpy.asarray(values, dtype=_numpy.float64)
+    nan = _numpy.isnan(values)
+    whole = _numpy.where(nan, 0, _numpy.floor(values))
+    micro = (whole.astype(_numpy.int64)*int(unit) +
+             _numpy.round((values - whole)*unit).astype(_numpy.int64))
+    return _numpy.where(nan, _NAT, micro)
+
+def to_jd(stamps):
+    '''
+    Converts time stamps to Julian dates (same convention as _date2jd).
+    NaTs become NaNs.
+
+    Args:
+        stamps (numpy.ndarray): datetime64 values or int64 micro-seconds
+            since 1970-01-01
+
+    Returns:
+        numpy.ndarray of float64
+    '''
+    micro = _as_micro(stamps)
+    days = micro // 86400000000
+    jds = days + _JD_UNIX_EPOCH + (micro - days*86400000000) / 864e8
+    return _numpy.where(micro == _NAT, _numpy.nan, jds)
+
+def from_jd(jds):
+    '''
+    Converts Julian dates (same convention as _date2jd) to time stamps,
+    rounded to the micro-second. NaNs become NaTs.
+
+    Args:
+        jds (numpy.ndarray or sequence of float): Julian dates
+
+    Returns:
+        numpy.ndarray of datetime64 (in micro-seconds)
+    '''
+    jds = _numpy.asarray(jds, dtype=_numpy.float64) - _JD_UNIX_EPOCH
+    return _split_micro(jds, 86400000000).view(_STAMP_DTYPE)
+
+def _from_seconds(seconds, epoch):
+    '''
+    Converts seconds since epoch (numpy.datetime64) to time stamps, rounded
+    to the micro-second
+    '''
+    micro = _split_micro(seconds, 1000000)
+    micro = _numpy.where(micro == _NAT, _NAT, micro + _as_micro(epoch))
+    return micro.view(_STAMP_DTYPE)
+
+# Width of the strftime directives that can be parsed by fixed-offset slicing
+_FIXED_WIDTHS = {'Y': 4, 'm': 2, 'd': 2, 'H': 2, 'M': 2, 'S': 2, 'f': 6}
+# Layouts tried when detecting the format of a column of time stamps
+_KNOWN_TIME_FORMATS = ['%Y-%m-%d %H:%M:%S.%f',
+                       '%Y-%m-%dT%H:%M:%S.%f',
+                       '%Y-%m-%d %H:%M:%S',
+                       '%Y-%m-%dT%H:%M:%S',
+                       '%Y-%m-%d']
+_SAMPLE_SIZE = 20
+# Growth factor of the column buffers when appending
+_GROWTH_FACTOR = 2
+# Number of bytes read at once from csv files
+_BLOCK_SIZE = 1 << 24
+# Replaces multi-character delimiters when splitting csv files
+_UNIT_SEPARATOR = '\x1f'
+# Name and version of the header of the binary column format (save_npy)
+_NPY_HEADER = 'header.json'
+_NPY_VERSION = 1
+# Units of the resampling rules (see DataMatrix.resample)
+_RULE_UNITS = {'us': 1, 'ms': 1000, 's': 1000000, 'min': 60000000,
+               'h': 3600000000, 'd': 86400000000}
+# Segment reductions of DataMatrix.resample
+_AGGREGATIONS = ('mean', 'min', 'max', 'sum', 'count', 'first', 'last')
+# Downsampling of DataMatrix.timeplot: methods and number of buckets per
+# pixel of the axis width
+_DOWNSAMPLE_METHODS = ('minmax', 'lttb')
+_DOWNSAMPLE_RATIO = 2
+# Binary log files (Logger with binary=True): magic string, version and
+# struct codes of the supported column types
+_BINARY_MAGIC = 'JOURNALB'
+_BINARY_VERSION = 1
+_BINARY_CODES = {'f8': 'd', 'i8': 'q', 'M8[us]': 'q'}
+
+def _fixed_layout(time_format):
+    '''
+    Returns the fixed-width layout of a strftime format: a tuple with the
+    list of (directive, start, stop) fields, the list of (position,
+    character) literals and the total width. Returns None if the format
+    cannot be parsed by fixed-offset slicing.
+
+    Args:
+        time_format (str): date format (same as for time.strftime)
+    '''
+    fields = []
+    literals = []
+    pos = 0
+    j = 0
+    while j < len(time_format):
+        char = time_format[j]
+        if char == '%':
+            code = time_format[j+1:j+2]
+            if code == '%':
+                literals.append((pos, '%'))
+                pos += 1
+            elif code in _FIXED_WIDTHS:
+                fields.append((code, pos, pos+_FIXED_WIDTHS[code]))
+                pos += _FIXED_WIDTHS[code]
+            else:
+                return None
+            j += 2
+        else:
+            literals.append((pos, char))
+            pos += 1
+            j += 1
+    return fields, literals, pos
+
+def _parse_fixed(strings, layout):
+    '''
+    Parses an array of strings with a fixed-width layout (see _fixed_layout)
+    in a single vectorized pass.
+
+    Args:
+        strings (numpy.ndarray): array of strings
+        layout (tuple): fixed-width layout
+
+    Returns:
+        tuple with the array of datetime64 values and a boolean array that
+            is False for the strings that do not match the layout
+    '''
+    fields, literals, width = layout
+    nrows = len(strings)
+    valid = _numpy.char.str_len(strings) == width
+    try:
+        strings = strings.astype('S{0}'.format(width))
+    except UnicodeEncodeError:
+        return _numpy.zeros(nrows, dtype=_STAMP_DTYPE), valid & False
+    chars = strings.view(_numpy.uint8).reshape(nrows, width)
+    for pos, char in literals:
+        valid &= chars[:, pos] == ord(char)
+    parts = {}
+    for code, start, stop in fields:
+        value = _numpy.zeros(nrows, dtype=_numpy.int64)
+        for pos in range(start, stop):
+            digit = chars[:, pos]
+            valid &= (digit >= ord('0')) & (digit <= ord('9'))
+            value = value*10 + digit - ord('0')
+        parts[code] = value
+    for code, default in [('Y', 1900), ('m', 1), ('d', 1)]:
+        parts[code] = _numpy.where(valid, parts.get(code, default), default)
+    zero = _numpy.zeros(nrows, dtype=_numpy.int64)
+    hour, minute, second, micro = [parts.get(code, zero)
+                                   for code in ['H', 'M', 'S', 'f']]
+    valid &= ((parts['m'] >= 1) & (parts['m'] <= 12) & (parts['d'] >= 1) &
+              (hour < 24) & (minute < 60) & (second < 60))
+    months = ((parts['Y']-1970)*12 + parts['m']-1).astype('datetime64[M]')
+    days = months.astype('datetime64[D]') + (parts['d']-1)
+    # day numbers beyond the end of the month overflow into the next month
+    valid &= days.astype('datetime64[M]') == months
+    micro = ((hour*60 + minute)*60 + second)*1000000 + micro
+    return days.astype(_STAMP_DTYPE) + micro.astype(_DELTA_DTYPE), valid
+
+def _parse_date(val, time_format=None):
+    '''
+    Parses a single time string into a datetime object, with
+    datetime.strptime if time_format is given and with dateutil otherwise
+    (or if strptime fails).
+
+    Args:
+        val (str): the string to parse
+        time_format (str, optional): date format (same as for time.strftime)
+
+    Raises:
+        ValueError (cannot be converted to a date)
+    '''
+    if time_format is not None:
+        try:
+            return _dt.datetime.strptime(val, time_format)
+        except (TypeError, ValueError):
+            pass
+    try:
+        return TimeColumn.parser.parse(val)
+    except:
+        raise ValueError('{0} cannot be converted to a date'.format(val))
+
+def _parse_times(strings, time_format=None):
+    '''
+    Parses an array of time strings into an array of numpy.datetime64.
+
+    A sample of the strings is used to detect a fixed layout (time_format if
+    given, else one of _KNOWN_TIME_FORMATS, or anything numpy can read as
+    ISO 8601). The whole array is then converted in one vectorized pass and
+    only the strings that do not match the layout are parsed one by one (see
+    _parse_date).
+
+    Args:
+        strings (numpy.ndarray): array of strings
+        time_format (str, optional): expected date format (same as for
+            time.strftime). Defaults to None.
+
+    Returns:
+        numpy.ndarray of datetime64 (in micro-seconds)
+
+    Raises:
+        ValueError (cannot be converted to a date)
+    '''
+    strings = _numpy.asarray(strings)
+    nrows = len(strings)
+    stamps = _numpy.zeros(nrows, dtype=_STAMP_DTYPE)
+    valid = _numpy.zeros(nrows, dtype=bool)
+    if nrows and strings.dtype.kind in 'SU':
+        sample = strings[::max(1, nrows//_SAMPLE_SIZE)]
+        layout = None
+        if time_format is not None:
+            layout = _fixed_layout(time_format)
+        else:
+            for the_format in _KNOWN_TIME_FORMATS:
+                if _parse_fixed(sample, _fixed_layout(the_format))[1].all():
+                    layout = _fixed_layout(the_format)
+                    break
+        if layout is not None:
+            stamps, valid = _parse_fixed(strings, layout)
+        elif (time_format is None and
+              all(_re.match(r'\d{4}-\d\d-\d\d', str(val)) for val in sample)):
+            try:
+                stamps = strings.astype(_STAMP_DTYPE)
+                valid[:] = True
+            except ValueError:
+                pass
+    for j in _numpy.flatnonzero(~valid):
+        stamps[j] = _date2stamp(_parse_date(strings[j], time_format))
+    return stamps
+
+def _extend(buffer, length, other):
+    '''
+    Copies other after the first `length` items of buffer. The buffer is
+    reallocated (with geometric growth) only if it is too small or if its
+    dtype cannot hold the new items, so that repeated appends cost amortized
+    O(1) per item.
+
+    Args:
+        buffer (numpy.ndarray): the buffer
+        length (int): number of items used in the buffer
+        other (numpy.ndarray): the items to append
+
+    Returns:
+        the buffer holding the length+len(other) items (may be a new array)
+    '''
+    needed = length + len(other)
+    dtype = _numpy.promote_types(buffer.dtype, other.dtype)
+    if needed > len(buffer) or dtype != buffer.dtype:
+        capacity = len(buffer)
+        if needed > capacity:
+            capacity = max(needed, int(capacity*_GROWTH_FACTOR), 16)
+        new_buffer = _numpy.empty(capacity, dtype=dtype)
+        new_buffer[:length] = buffer[:length]
+        buffer = new_buffer
+    buffer[length:needed] = other
+    return buffer
+
 def _isiterable(obj):
     '''
     Checks if an object is iterable
@@ -70,8 +478,17 @@ def _iter_letters():
 class AbstractDataColumn(object):
     '''
     Base class for all data column objects
+
+    The data is kept in a buffer that can be larger than the column, so that
+    appending is cheap. `values` is a view on the part of the buffer in use.
+
+    A column built from a 1-d numpy array (or from another column) wraps
+    that array without copying it, unless copy is True, and slices of a
+    column are views on its data: use copy() to get independent data.
     '''
-    def __init__(self, the_input=None, title=''):
+    _buffers = ('_values',)
+
+    def __init__(self, the_input=None, title='', copy=False):
         '''
         Initialization of the AbstractDataColumn class
 
@@ -79,12 +496,20 @@ class AbstractDataColumn(object):
             the_input (object, optional): data input. Can be an iterable, a
                 string, an integer, a float, ...
             title (str, optional): column title. By default, ''
+            copy (bool, optional): if True, a numpy array (or column) input
+                is copied (into a contiguous array) instead of being wrapped.
+                By default, False.
 
         Raises:
         '''
         array = _numpy.array
+        if isinstance(the_input, AbstractDataColumn):
+            the_input = the_input.values
         if the_input is None:
             self.values = array([])
+        elif (isinstance(the_input, _numpy.ndarray) and the_input.ndim == 1
+              and the_input.dtype.kind != 'O'):
+            self.values = the_input.copy() if copy else the_input
         elif isinstance(the_input, str):
             self.values = array([the_input])
         else:
@@ -95,6 +520,40 @@ class AbstractDataColumn(object):
         self.title = title
         self.type = self.values.dtype.type
 
+    @property
+    def values(self):
+        '''
+        values property: _numpy array with the data in the column
+        '''
+        return self._values[:self._length]
+
+    @values.setter
+    def values(self, values):
+        '''
+        Sets the data in the column
+        '''
+        self._values = values
+        self._length = len(values)
+
+    def __getstate__(self):
+        '''
+        Pickling: the spare capacity of the buffers is not saved
+        '''
+        state = self.__dict__.copy()
+        for name in self._buffers:
+            if state[name] is not None:
+                state[name] = state[name][:self._length]
+        return state
+
+    def __setstate__(self, state):
+        '''
+        Unpickling (also handles columns pickled before the buffers existed)
+        '''
+        state = dict(state)
+        if 'values' in state:
+            state['_values'] = state.pop('values')
+            state['_length'] = len(state['_values'])
+        self.__dict__.update(state)
 
     def __str__(self):
         '''
@@ -113,7 +572,7 @@ class AbstractDataColumn(object):
         '''
         Length of column
         '''
-        return len(self.values)
+        return self._length
 
     def __nonzero__(self):
         '''
@@ -166,7 +625,7 @@ class AbstractDataColumn(object):
         '''
         Returns a copy of the object
         '''
-        return AbstractDataColumn(self.values, self.title)
+        return AbstractDataColumn(self.values, self.title, copy=True)
 
     @property
     def max(self):
@@ -192,7 +651,7 @@ class DataColumn(AbstractDataColumn):
     '''
     DataColumn class
     '''
-    def __init__(self, the_input=None, title=''):
+    def __init__(self, the_input=None, title='', copy=False):
         '''
         Initialization of the DataColumn class
 
@@ -200,10 +659,13 @@ class DataColumn(AbstractDataColumn):
             the_input (object, optional): data input. Can be an iterable, a
                 string, an integer, a float, ...
             title (str, optional): column title. By default, ''
+            copy (bool, optional): if True, a numpy array (or column) input
+                is copied instead of being wrapped. By default, False.
 
         Raises:
         '''
-        AbstractDataColumn.__init__(self, the_input=the_input, title=title)
+        AbstractDataColumn.__init__(self, the_input=the_input, title=title,
+                                    copy=copy)
 
     ##################
     ### Comparison ###
@@ -357,11 +819,45 @@ class DataColumn(AbstractDataColumn):
         '''
         return DataColumn(self.values.__rpow__(other))
 
+    ###############
+    ### Logical ###
+    ###############
+
+    def __and__(self, other):
+        '''
+        __and__ operator (element-wise, e.g. to combine masks)
+        '''
+        if isinstance(other, AbstractDataColumn):
+            other = other.values
+        return DataColumn(self.values.__and__(other))
+
+    def __or__(self, other):
+        '''
+        __or__ operator (element-wise, e.g. to combine masks)
+        '''
+        if isinstance(other, AbstractDataColumn):
+            other = other.values
+        return DataColumn(self.values.__or__(other))
+
+    def __xor__(self, other):
+        '''
+        __xor__ operator (element-wise)
+        '''
+        if isinstance(other, AbstractDataColumn):
+            other = other.values
+        return DataColumn(self.values.__xor__(other))
+
+    def __invert__(self):
+        '''
+        __invert__ operator (element-wise, e.g. to negate a mask)
+        '''
+        return DataColumn(self.values.__invert__())
+
     def copy(self):
         '''
         Returns a copy of the object
         '''
-        return DataColumn(self.values, self.title)
+        return DataColumn(self.values, self.title, copy=True)
 
     def append(self, other):
         '''
@@ -371,10 +867,11 @@ class DataColumn(AbstractDataColumn):
             other (object): can be a DataColumn, a numpy array or a scalar value
         '''
         if isinstance(other, DataColumn):
-            self.values = _numpy.append(self.values, other.values)
-        else:
-            self.values = _numpy.append(self.values, other)
-        self.type = self.values.dtype.type
+            other = other.values
+        other = _numpy.ravel(other)
+        self._values = _extend(self._values, self._length, other)
+        self._length += len(other)
+        self.type = self._values.dtype.type
 
     ##############################
     ### Statistical properties ###
@@ -477,38 +974,260 @@ class UnchangeableDataColumn(DataColumn):
 class TimeColumn(AbstractDataColumn):
     '''
     Class for time data
+
+    The time stamps are parsed only once, when they enter the column, and
+    are stored in the `stamps` attribute as a numpy array of datetime64
+    (microsecond resolution). All time properties, comparisons and
+    operations work on that array. `values` keeps the string representation
+    of the time stamps (for columns built from datetime64 values, the
+    strings are only generated when they are first needed).
     '''
-    import dateutil.parser as parser
+    parser = _LazyModule('dateutil.parser')
     __default_epoch = _dt.datetime(1970, 1, 1)
+    _buffers = ('_values', '_stamps')
+    # for a slice, (column, item) of the column it was taken from
+    _base = None
+    # generation of the time strings (see _string_buffer)
+    _strings = 0
 
-    def __init__(self, the_input=None, epoch=None):
+    def __init__(self, the_input=None, epoch=None, time_format=None):
         '''
         Time data initiliazation
 
         Args:
             the_input (list, optional): sequence of strings representing the
-                time
+                time, datetime objects or numpy.datetime64 values (see
+                TimeColumn.from_jd and TimeColumn.from_epoch for numbers)
             epoch (datetime object, optional): epoch. By default,
                 dt.datetime(1970,1,1)
+            time_format (str, optional): format of the time strings (same as
+                for time.strftime), e.g. '%Y-%m-%d %H:%M:%S.%f'. By default,
+                the format is detected from a sample of the strings.
 
         Raises:
             ValueError (cannot be converted to a date)
         '''
-        AbstractDataColumn.__init__(self, the_input=the_input, title='time')
-        for j, val in enumerate(self.values):
-            if isinstance(val, _dt.datetime):
-                self.values[j] = val.strftime('%Y-%m-%dT%H:%M:%S.%f')
-                continue
-            try:
-                _ = TimeColumn.parser.parse(val)
-            except:
-                raise ValueError('{0} cannot be converted to a date'.format(val))
+        # (the strings are set, and read, before the stamps)
+        self._versions = [next(_STAMP_VERSIONS), 0]
+        if isinstance(the_input, TimeColumn):
+            self.values = the_input.values.copy()
+            self.stamps = the_input.stamps.copy()
+        else:
+            AbstractDataColumn.__init__(self, the_input=the_input,
+                                        title='time')
+            self.values, self.stamps = TimeColumn._parse(self.values,
+                                                         time_format)
+        self.title = 'time'
+        self.type = self.values.dtype.type
+        if time_format is None and isinstance(the_input, TimeColumn):
+            time_format = the_input.time_format
+        self.time_format = time_format
 
         if epoch is None:
             self.epoch = TimeColumn.__default_epoch
         else:
             self.epoch = epoch
 
+    @staticmethod
+    def _parse(values, time_format=None):
+        '''
+        Parses an array of time stamps
+
+        Args:
+            values (numpy.ndarray): strings, datetime objects or
+                numpy.datetime64 values
+            time_format (str, optional): expected format of the strings (same
+                as for time.strftime). Defaults to None (auto-detection).
+
+        Returns:
+            tuple with the array of time strings and the array of datetime64
+
+        Raises:
+            ValueError (cannot be converted to a date)
+        '''
+        if values.dtype.kind == 'M':
+            stamps = values.astype(_STAMP_DTYPE)
+            return _stamps2str(stamps), stamps
+        if values.dtype.kind != 'O':
+            return values, _parse_times(values, time_format)
+        strings = list(values)
+        stamps = _numpy.empty(len(strings), dtype=_STAMP_DTYPE)
+        unparsed = []
+        for j, val in enumerate(strings):
+            if isinstance(val, _numpy.datetime64):
+                val = val.astype(_STAMP_DTYPE).astype(object)
+            if isinstance(val, _dt.datetime):
+                strings[j] = val.strftime(_TIME_FORMAT)
+                stamps[j] = _date2stamp(val)
+            else:
+                unparsed.append(j)
+        if unparsed:
+            stamps[unparsed] = _parse_times(
+                _numpy.array([strings[j] for j in unparsed]), time_format)
+        return _numpy.array(strings, dtype=str), stamps
+
+    @staticmethod
+    def _as_stamps(other):
+        '''
+        Converts other into datetime64 value(s) to compare or subtract it
+
+        Args:
+            other (TimeColumn, datetime, str, numpy.datetime64 or iterable)
+
+        Raises:
+            ValueError (cannot be converted to a date)
+        '''
+        if isinstance(other, TimeColumn):
+            return other.stamps
+        if isinstance(other, AbstractDataColumn):
+            other = other.values
+        if isinstance(other, str) or not _isiterable(other):
+            return TimeColumn._parse(_numpy.array([other]))[1][0]
+        return TimeColumn._parse(_numpy.array(list(other)))[1]
+
+    @staticmethod
+    def _as_timedeltas(other):
+        '''
+        Converts other into timedelta64 value(s) to shift a column by
+
+        Args:
+            other (datetime.timedelta, numpy.timedelta64 or iterable)
+
+        Raises:
+            TypeError (not a time difference)
+        '''
+        if isinstance(other, (_dt.timedelta, _numpy.timedelta64)):
+            return _numpy.timedelta64(other).astype(_DELTA_DTYPE)
+        if _isiterable(other) and not isinstance(other, AbstractDataColumn):
+            deltas = _numpy.array(list(other))
+            if deltas.dtype.kind == 'm' or (
+                    deltas.dtype.kind == 'O' and
+                    all(isinstance(val, _dt.timedelta) for val in deltas)):
+                return deltas.astype(_DELTA_DTYPE)
+        raise TypeError('Unsupported operand for a TimeColumn: '
+                        '{0}'.format(type(other)))
+
+    def _new(self, stamps, values=None):
+        '''
+        Builds a new TimeColumn from datetime64 values without parsing them
+
+        Args:
+            stamps (numpy.ndarray): datetime64 values
+            values (numpy.ndarray, optional): the corresponding strings. If
+                None, they are generated from stamps when first needed.
+        '''
+        col = TimeColumn.__new__(TimeColumn)
+        col.stamps = stamps
+        col._values = values
+        col.title = 'time'
+        col.type = _numpy.string_ if values is None else values.dtype.type
+        col.epoch = self.epoch
+        col.time_format = self.time_format
+        return col
+
+    @property
+    def values(self):
+        '''
+        values property: _numpy array with the time strings
+        '''
+        return self._string_buffer()[:self._length]
+
+    @values.setter
+    def values(self, values):
+        '''
+        Sets the time strings (must be consistent with the time stamps)
+        '''
+        self._values = values
+        self._length = len(values)
+        self._strings = self._versions[1]
+
+    def _string_buffer(self):
+        '''
+        Returns the buffer of the time strings, after building it if it is
+        missing or out of date. The strings are out of date when their
+        generation differs from the one shared with the slices (changed when
+        a write cannot go to the shared buffer of strings). A slice then
+        takes its strings from the column it was taken from again, if they
+        still share the stamps, otherwise they are generated from the stamps.
+        '''
+        if self._values is None or self._strings != self._versions[1]:
+            if (self._base is not None and
+                    self._base[0]._versions is self._versions):
+                column, item = self._base
+                self._values = column.values[item]
+            else:
+                self._values = _stamps2str(self.stamps)
+            self._strings = self._versions[1]
+        return self._values
+
+    def _new_strings(self):
+        '''
+        Records that the column has a new buffer of strings (or new strings
+        that could not be written to the shared buffer): the strings of the
+        other columns sharing the stamps are built again.
+        '''
+        self._versions[1] += 1
+        self._strings = self._versions[1]
+
+    @property
+    def stamps(self):
+        '''
+        stamps property: _numpy array of datetime64 with the time stamps.
+        Change them through the column (col[j] = ...), so that the time
+        index of the matrices is rebuilt.
+        '''
+        return self._stamps[:self._length]
+
+    @stamps.setter
+    def stamps(self, stamps):
+        '''
+        Sets the time stamps (must be consistent with values)
+        '''
+        self._stamps = stamps
+        self._length = len(stamps)
+        # versions of the stamps and generation of the strings, shared with
+        # the slices, which are views on the same stamps
+        self._versions = [next(_STAMP_VERSIONS), 0]
+        self._strings = 0
+        self._base = None
+
+    @property
+    def _version(self):
+        '''
+        Version of the time stamps (see DataMatrix time index): it changes
+        with every write to the stamps, through the column or through one
+        of its slices
+        '''
+        return self._versions[0]
+
+    def __getstate__(self):
+        '''
+        Pickling: a slice is pickled without the column it was taken from
+        '''
+        state = AbstractDataColumn.__getstate__(self)
+        state.pop('_base', None)
+        return state
+
+    def _changed(self):
+        '''
+        Records a write to the time stamps (see _version)
+        '''
+        self._versions[0] = next(_STAMP_VERSIONS)
+
+    def __setstate__(self, state):
+        '''
+        Unpickling: time columns pickled without stamps are parsed again
+        '''
+        AbstractDataColumn.__setstate__(self, state)
+        if '_versions' not in state:
+            self._versions = [next(_STAMP_VERSIONS), 0]
+        if '_stamps' not in state:
+            self.values, self.stamps = TimeColumn._parse(self.values)
+        if 'epoch' not in state:
+            self.epoch = TimeColumn.__default_epoch
+        if 'time_format' not in state:
+            self.time_format = None
+
     def __repr__(self):
         '''
         __repr__ for time column
@@ -521,114 +1240,120 @@ class TimeColumn(AbstractDataColumn):
         Gets item from column
         '''
         if isinstance(item, DataColumn):
-            return TimeColumn(self.values[item.values])
-        elif isinstance(item, slice):
-            return TimeColumn(self.values[item])
-        else:
+            item = item.values
+        elif not isinstance(item, (slice, list, _numpy.ndarray)):
             return self.values[item]
+        values = None if self._values is None else self.values[item]
+        col = self._new(self.stamps[item], values)
+        if isinstance(item, slice):
+            col._versions = self._versions
+            col._strings = self._strings
+            col._base = (self, item)
+        return col
 
     def __setitem__(self, item, value):
         '''
         Sets item of column
         '''
         if isinstance(value, TimeColumn):
-            self.values[item] = value.values
-            return
-        if _isiterable(value):
-            for j, val in enumerate(value):
-                ### do sth about datetime objects here
-                if isinstance(val, _dt.datetime):
-                    value[j] = val.strftime('%Y-%m-%dT%H:%M:%S.%f')
-                    continue
-                try:
-                    _ = TimeColumn.parser.parse(val)
-                except:
-                    raise ValueError('{0} cannot be converted to a date'.format(val))
+            strings, stamps = value.values, value.stamps
+        elif _isiterable(value) and not isinstance(value, str):
+            strings, stamps = TimeColumn._parse(_numpy.array(list(value)),
+                                                self.time_format)
         else:
-            if isinstance(value, _dt.datetime):
-                value = value.strftime('%Y-%m-%dT%H:%M:%S.%f')
-            try:
-                _ = TimeColumn.parser.parse(value)
-            except:
-                raise ValueError('{0} cannot be converted to a date'.format(value))
-
-        self.values[item] = value
-
+            strings, stamps = TimeColumn._parse(_numpy.array([value]),
+                                                self.time_format)
+            strings, stamps = strings[0], stamps[0]
+        strings = _numpy.asarray(strings)
+        self.stamps[item] = stamps
+        self._changed()
+        if (strings.dtype.kind == self.values.dtype.kind and
+                strings.dtype.itemsize > self.values.dtype.itemsize):
+            if self._base is not None:
+                # the strings of a slice are a view on the strings of its
+                # column: all the strings are built again from the stamps
+                self._versions[1] += 1
+                return
+            self.values = self.values.astype(strings.dtype)
+            self._new_strings()
+        self.values[item] = strings
+
+    def _compare(self, other, operator):
+        '''
+        Compares the time stamps with other using operator (e.g. '__lt__')
+        '''
+        try:
+            stamps = TimeColumn._as_stamps(other)
+        except ValueError:
+            if isinstance(other, TimeColumn):
+                other = other.date
+            return getattr(self.date, operator)(other)
+        return DataColumn(getattr(self.stamps, operator)(stamps))
 
     def __lt__(self, other):
         '''
         Comparison method: __lt__
         '''
-        if isinstance(other, TimeColumn):
-            return self.date.__lt__(other.date)
-        return self.date.__lt__(other)
+        return self._compare(other, '__lt__')
 
     def __le__(self, other):
         '''
         Comparison method: __le__
         '''
-        if isinstance(other, TimeColumn):
-            return self.date.__le__(other.date)
-        return self.date.__le__(other)
+        return self._compare(other, '__le__')
 
     def __gt__(self, other):
         '''
         Comparison method: __gt__
         '''
-        if isinstance(other, TimeColumn):
-            return self.date.__gt__(other.date)
-        return self.date.__gt__(other)
+        return self._compare(other, '__gt__')
 
     def __ge__(self, other):
         '''
         Comparison method: __ge__
         '''
-        if isinstance(other, TimeColumn):
-            return self.date.__ge__(other.date)
-        return self.date.__ge__(other)
+        return self._compare(other, '__ge__')
 
     def __eq__(self, other):
         '''
         Comparison method: __eq__
         '''
-        if isinstance(other, TimeColumn):
-            return self.date.__eq__(other.date)
-        return self.date.__eq__(other)
+        return self._compare(other, '__eq__')
 
     def __ne__(self, other):
         '''
         Comparison method: __ne__
         '''
-        if isinstance(other, TimeColumn):
-            return self.date.__ne__(other.date)
-        return self.date.__ne__(other)
+        return self._compare(other, '__ne__')
 
     def __add__(self, other):
         '''
         __add__ operator
         '''
-        return TimeColumn(self.date.__add__(other))
+        return self._new(self.stamps + TimeColumn._as_timedeltas(other))
 
     def __sub__(self, other):
         '''
         __sub__ operator
         '''
-        if isinstance(other, _dt.datetime):
-            return self.date.__sub__(other).map(lambda x: x.total_seconds())
-        else:
-            return TimeColumn(self.date.__sub__(other))
+        if isinstance(other, (_dt.datetime, _numpy.datetime64)):
+            seconds = ((self.stamps - TimeColumn._as_stamps(other))
+                       .astype(_numpy.int64) / 1e6)
+            return DataColumn(seconds)
+        return self._new(self.stamps - TimeColumn._as_timedeltas(other))
 
     def __radd__(self, other):
         '''
         __radd__ operator
         '''
-        return TimeColumn(self.date.__radd__(other))
+        return self.__add__(other)
 
     def copy(self):
         '''
         Returns a copy of the object
         '''
-        return TimeColumn(self.values, self.title)
+        values = None if self._values is None else self.values.copy()
+        return self._new(self.stamps.copy(), values)
 
     @property
     def date(self):
@@ -638,15 +1363,14 @@ class TimeColumn(AbstractDataColumn):
         Returns:
             a new UnchangeableDataColumn with datetime objects
         '''
-        return UnchangeableDataColumn([TimeColumn.parser.parse(val)
-                                       for val in self.values])
+        return UnchangeableDataColumn(self.stamps.astype(object))
 
     def iterdates(self):
         '''
         Generator of dates
         '''
-        for val in self.values:
-            yield TimeColumn.parser.parse(val)
+        for val in self.stamps.astype(object):
+            yield val
 
     @property
     def time_since_epoch(self):
@@ -656,24 +1380,92 @@ class TimeColumn(AbstractDataColumn):
         Returns:
             a new UnchangeableDataColumn with times since epoch in seconds
         '''
-        return UnchangeableDataColumn([(TimeColumn.parser.parse(val)-self.epoch).total_seconds()
-                                       for val in self.values])
+        return UnchangeableDataColumn(self._seconds_since(
+            _date2stamp(self.epoch)))
 
     def itertimes_since_epoch(self):
         '''
         Generator of time_since_epoch
         '''
-        for val in self.values:
-            yield (TimeColumn.parser.parse(val)-self.epoch).total_seconds()
+        for val in self._seconds_since(_date2stamp(self.epoch)):
+            yield val
+
+    def _seconds_since(self, stamp):
+        '''
+        Array of seconds elapsed between stamp (numpy.datetime64) and the
+        time stamps of the column
+        '''
+        return (self.stamps - stamp).astype(_numpy.int64) / 1e6
 
     def time_from_epoch(self, timestamp):
         '''
         datetime obtained from timestamp since epoch
 
+        Args:
+            timestamp (float or sequence of floats): seconds since epoch
+
         Returns:
-            datetime.datetime object
+            datetime.datetime object, or numpy.ndarray of datetime64 (in
+            micro-seconds) if timestamp is a sequence
         '''
-        return self.epoch + _dt.timedelta(seconds=timestamp)
+        stamps = _from_seconds(timestamp, _date2stamp(self.epoch))
+        if stamps.ndim:
+            return stamps
+        return stamps[()].astype(_dt.datetime)
+
+    @staticmethod
+    def from_jd(jds, epoch=None, time_format=None):
+        '''
+        Builds a TimeColumn from Julian dates (same convention as _date2jd)
+
+        Args:
+            jds (sequence of floats or DataColumn): the Julian dates
+            epoch (datetime object, optional): epoch. By default,
+                dt.datetime(1970,1,1)
+            time_format (str, optional): time format of the column
+
+        Returns:
+            TimeColumn
+        '''
+        if isinstance(jds, AbstractDataColumn):
+            jds = jds.values
+        col = TimeColumn(epoch=epoch, time_format=time_format)
+        return col._new(from_jd(jds))
+
+    @staticmethod
+    def from_epoch(seconds, epoch=None, time_format=None):
+        '''
+        Builds a TimeColumn from numbers of seconds since epoch
+
+        Args:
+            seconds (sequence of floats or DataColumn): the seconds since
+                epoch
+            epoch (datetime object, optional): epoch. By default,
+                dt.datetime(1970,1,1)
+            time_format (str, optional): time format of the column
+
+        Returns:
+            TimeColumn
+        '''
+        if isinstance(seconds, AbstractDataColumn):
+            seconds = seconds.values
+        col = TimeColumn(epoch=epoch, time_format=time_format)
+        return col._new(_from_seconds(seconds, _date2stamp(col.epoch)))
+
+    @property
+    def _time_of_day(self):
+        '''
+        _numpy array with the number of micro-seconds since midnight
+        '''
+        return (self.stamps -
+                self.stamps.astype('datetime64[D]')).astype(_numpy.int64)
+
+    @property
+    def _jds(self):
+        '''
+        _numpy array with Julian dates (same convention as _date2jd)
+        '''
+        return to_jd(self.stamps)
 
     @property
     def jd(self):
@@ -683,8 +1475,7 @@ class TimeColumn(AbstractDataColumn):
         Returns:
             a new UnchangeableDataColumn with the jds
         '''
-        return UnchangeableDataColumn([_date2jd(TimeColumn.parser.parse(val))
-                                       for val in self.values])
+        return UnchangeableDataColumn(self._jds)
 
     @property
     def time(self):
@@ -696,14 +1487,14 @@ class TimeColumn(AbstractDataColumn):
             a new UnchangeableDataColumn with the times in seconds
                 starting from 0
         '''
-        return UnchangeableDataColumn([val for val in self-self.date.min])
+        return UnchangeableDataColumn(self._seconds_since(self.stamps.min()))
 
     def iterjds(self):
         '''
         Generator of jds
         '''
-        for val in self.values:
-            yield _date2jd(TimeColumn.parser.parse(val))
+        for val in self._jds:
+            yield val
 
     @property
     def year(self):
@@ -713,8 +1504,8 @@ class TimeColumn(AbstractDataColumn):
         Returns:
             a new UnchangeableDataColumn with the years
         '''
-        return UnchangeableDataColumn([TimeColumn.parser.parse(val).year
-                                       for val in self.values])
+        years = self.stamps.astype('datetime64[Y]').astype(_numpy.int64)
+        return UnchangeableDataColumn(years + 1970)
 
     @property
     def month(self):
@@ -724,8 +1515,8 @@ class TimeColumn(AbstractDataColumn):
         Returns:
             a new UnchangeableDataColumn with the months
         '''
-        return UnchangeableDataColumn([TimeColumn.parser.parse(val).month
-                                       for val in self.values])
+        months = self.stamps.astype('datetime64[M]').astype(_numpy.int64)
+        return UnchangeableDataColumn(months % 12 + 1)
 
     @property
     def day(self):
@@ -735,8 +1526,9 @@ class TimeColumn(AbstractDataColumn):
         Returns:
             a new UnchangeableDataColumn with the day
         '''
-        return UnchangeableDataColumn([TimeColumn.parser.parse(val).day
-                                       for val in self.values])
+        days = (self.stamps.astype('datetime64[D]') -
+                self.stamps.astype('datetime64[M]')).astype(_numpy.int64)
+        return UnchangeableDataColumn(days + 1)
 
     @property
     def hour(self):
@@ -746,8 +1538,7 @@ class TimeColumn(AbstractDataColumn):
         Returns:
             a new UnchangeableDataColumn with the hours
         '''
-        return UnchangeableDataColumn([TimeColumn.parser.parse(val).hour
-                                       for val in self.values])
+        return UnchangeableDataColumn(self._time_of_day // 3600000000)
 
     @property
     def minute(self):
@@ -757,8 +1548,7 @@ class TimeColumn(AbstractDataColumn):
         Returns:
             a new UnchangeableDataColumn with the minutes
         '''
-        return UnchangeableDataColumn([TimeColumn.parser.parse(val).minute
-                                       for val in self.values])
+        return UnchangeableDataColumn(self._time_of_day // 60000000 % 60)
 
     @property
     def second(self):
@@ -768,8 +1558,7 @@ class TimeColumn(AbstractDataColumn):
         Returns:
             a new UnchangeableDataColumn with the seconds
         '''
-        return UnchangeableDataColumn([TimeColumn.parser.parse(val).second
-                                       for val in self.values])
+        return UnchangeableDataColumn(self._time_of_day // 1000000 % 60)
 
     @property
     def microsecond(self):
@@ -779,18 +1568,18 @@ class TimeColumn(AbstractDataColumn):
         Returns:
             a new UnchangeableDataColumn with the micro-seconds
         '''
-        return UnchangeableDataColumn([TimeColumn.parser.parse(val).microsecond
-                                       for val in self.values])
+        return UnchangeableDataColumn(self._time_of_day % 1000000)
 
     def reformat(self, the_format):
         '''
-        reformats the time stamps to the_format and change all values in the column
+        reformats the time stamps to the_format and change all values in the
+        column. The underlying datetime64 stamps are left untouched.
 
         Args:
             the_format: date format (same as for time.strftime)
         '''
-        self.values = _numpy.array([TimeColumn.parser.parse(val).strftime(the_format)
-                                    for val in self.values])
+        self.values = _numpy.array(list(self.iterformat(the_format)))
+        self.type = self.values.dtype.type
 
     def format(self, the_format):
         '''
@@ -802,8 +1591,7 @@ class TimeColumn(AbstractDataColumn):
         Returns:
             a new UnchangeableDataColumn with the formatted times
         '''
-        return UnchangeableDataColumn([TimeColumn.parser.parse(val).strftime(the_format)
-                                       for val in self.values])
+        return UnchangeableDataColumn(list(self.iterformat(the_format)))
 
     def iterformat(self, the_format):
         '''
@@ -812,29 +1600,31 @@ class TimeColumn(AbstractDataColumn):
         Args:
             the_format: date format (same as for time.strftime)
         '''
-        for val in self.values:
-            yield TimeColumn.parser.parse(val).strftime(the_format)
+        for val in self.stamps.astype(object):
+            yield val.strftime(the_format)
 
     @property
     def min(self):
         '''
         Minimum time value in the column as datetime object
         '''
-        return self.date.min
+        return self.stamps.min().astype(object)
 
     @property
     def max(self):
         '''
         Maximum value in the column
         '''
-        return self.date.max
+        return self.stamps.max().astype(object)
 
     @property
     def mean(self):
         '''
         Mean value in the column
         '''
-        return self.time_from_epoch(self.time_since_epoch.mean)
+        start = self.stamps.min()
+        offset = self._seconds_since(start).mean()
+        return start.astype(object) + _dt.timedelta(seconds=offset)
 
     @property
     def sum(self):
@@ -851,40 +1641,213 @@ class TimeColumn(AbstractDataColumn):
         '''
         Median value in the column
         '''
-        return self.time_from_epoch(self.time_since_epoch.median)
+        start = self.stamps.min()
+        offset = _numpy.median(self._seconds_since(start))
+        return start.astype(object) + _dt.timedelta(seconds=offset)
 
 
     def append(self, other):
         '''
         appends other to the end of column
         '''
-        append = _numpy.append
         if isinstance(other, TimeColumn):
-            self.values = append(self.values, other.values)
-        elif _isiterable(other):
-            for j, val in enumerate(other):
-                if isinstance(val, _dt.datetime):
-                    other[j] = val.strftime('%Y-%m-%dT%H:%M:%S.%f')
-                    continue
-                try:
-                    _ = TimeColumn.parser.parse(val)
-                except:
-                    raise ValueError('{0} cannot be converted to a date'.format(val))
-            self.values = append(self.values, other)
+            strings, stamps = other.values, other.stamps
+        elif _isiterable(other) and not isinstance(other, str):
+            strings, stamps = TimeColumn._parse(_numpy.array(list(other)),
+                                                self.time_format)
         else:
-            if isinstance(other, _dt.datetime):
-                other = other.strftime('%Y-%m-%dT%H:%M:%S.%f')
-            try:
-                _ = TimeColumn.parser.parse(other)
-            except:
-                raise ValueError('{0} cannot be converted to a date'.format(other))
-            self.values = append(self.values, other)
-        self.type = self.values.dtype.type
+            strings, stamps = TimeColumn._parse(_numpy.array([other]),
+                                                self.time_format)
+        length = self._length
+        buffers = self._string_buffer(), self._stamps
+        self._values = _extend(buffers[0], length, strings)
+        self._stamps = _extend(buffers[1], length, stamps)
+        self._length = length + len(stamps)
+        self.type = self._values.dtype.type
+        self._changed()
+        if self._stamps is not buffers[1]:
+            # the stamps are no longer shared with the slices
+            self._versions = [next(_STAMP_VERSIONS), 0]
+            self._strings = 0
+            self._base = None
+        elif self._values is not buffers[0]:
+            self._new_strings()
+
+_QUERY_CACHE = {}
+_QUERY_BINARY = {_ast.Add: _operator.add, _ast.Sub: _operator.sub,
+                 _ast.Mult: _operator.mul, _ast.Div: _operator.truediv,
+                 _ast.FloorDiv: _operator.floordiv, _ast.Mod: _operator.mod,
+                 _ast.Pow: _operator.pow, _ast.BitAnd: _operator.and_,
+                 _ast.BitOr: _operator.or_, _ast.BitXor: _operator.xor}
+_QUERY_UNARY = {_ast.Not: _numpy.logical_not, _ast.Invert: _operator.invert,
+                _ast.USub: _operator.neg, _ast.UAdd: _operator.pos}
+_QUERY_COMPARE = {_ast.Eq: _operator.eq, _ast.NotEq: _operator.ne,
+                  _ast.Lt: _operator.lt, _ast.LtE: _operator.le,
+                  _ast.Gt: _operator.gt, _ast.GtE: _operator.ge}
+
+def _compile_query(expression):
+    '''
+    Parses a query expression into a plan: a tree of tuples ('column',
+    name, quoted), ('value', constant), ('unary', function, node), ('binary',
+    function, left, right), ('compare', function, left, right), ('isin',
+    negate, node, values), ('and', nodes) and ('or', nodes). The plans are
+    cached.
+
+    Args:
+        expression (str): the query (see DataMatrix.query)
+
+    Raises:
+        ValueError (invalid query)
+    '''
+    plan = _QUERY_CACHE.get(expression)
+    if plan is not None:
+        return plan
+    quoted = []
+    def quote(match):
+        '''
+        Replaces a `quoted name` with an identifier
+        '''
+        quoted.append(match.group(1))
+        return ' __column{0}__ '.format(len(quoted)-1)
+    source = _re.sub(r'`([^`]*)`', quote, expression).strip()
+    try:
+        tree = compile(source, '<query>', 'eval', _ast.PyCF_ONLY_AST)
+    except SyntaxError as err:
+        raise ValueError('Invalid query {0!r}: {1}'.format(expression,
+                                                           err.msg))
+    plan = _query_node(tree.body, quoted, expression)
+    if len(_QUERY_CACHE) >= _QUERY_CACHE_SIZE:
+        _QUERY_CACHE.clear()
+    _QUERY_CACHE[expression] = plan
+    return plan
+
+def _query_node(node, quoted, expression):
+    '''
+    Converts a node of the syntax tree of a query into a plan node
+
+    Raises:
+        ValueError (unsupported syntax)
+    '''
+    convert = lambda child: _query_node(child, quoted, expression)
+    if isinstance(node, _ast.Name):
+        match = _re.match(r'^__column(\d+)__$', node.id)
+        if match:
+            return ('column', quoted[int(match.group(1))], True)
+        if node.id in ('True', 'False'):
+            return ('value', node.id == 'True')
+        return ('column', node.id, False)
+    if isinstance(node, (_ast.Num, _ast.Str)):
+        return ('value', node.n if isinstance(node, _ast.Num) else node.s)
+    if isinstance(node, _ast.BoolOp):
+        kind = 'and' if isinstance(node.op, _ast.And) else 'or'
+        return (kind, [convert(child) for child in node.values])
+    if isinstance(node, _ast.UnaryOp) and type(node.op) in _QUERY_UNARY:
+        return ('unary', _QUERY_UNARY[type(node.op)], convert(node.operand))
+    if isinstance(node, _ast.BinOp) and type(node.op) in _QUERY_BINARY:
+        return ('binary', _QUERY_BINARY[type(node.op)], convert(node.left),
+                convert(node.right))
+    if isinstance(node, _ast.Compare):
+        comparisons = []
+        left = convert(node.left)
+        for operator, child in zip(node.ops, node.comparators):
+            if isinstance(operator, (_ast.In, _ast.NotIn)):
+                if not isinstance(child, (_ast.List, _ast.Tuple)):
+                    break
+                values = [convert(item) for item in child.elts]
+                if any(value[0] != 'value' for value in values):
+                    break
+                comparisons.append(('isin', isinstance(operator, _ast.NotIn),
+                                    left, [value[1] for value in values]))
+                left = None
+            elif type(operator) in _QUERY_COMPARE:
+                right = convert(child)
+                comparisons.append(('compare', _QUERY_COMPARE[type(operator)],
+                                    left, right))
+                left = right
+            else:
+                break
+            if left is None and len(comparisons) < len(node.ops):
+                break
+        else:
+            if len(comparisons) == 1:
+                return comparisons[0]
+            return ('and', comparisons)
+    raise ValueError('Unsupported syntax in query {0!r}'.format(expression))
+
+def _bind_query(node, columns):
+    '''
+    Replaces the column names of a plan with the column arrays ('array'
+    nodes) and converts the constants compared to the time column into
+    datetime64 values
+
+    Raises:
+        KeyError (unknown column)
+    '''
+    kind = node[0]
+    if kind == 'column':
+        name = node[1]
+        if name not in columns and not node[2]:
+            name = name.replace('_', ' ')
+        if name not in columns:
+            raise KeyError('Unknown column {0}'.format(node[1]))
+        col = columns[name]
+        return ('array', col.stamps if isinstance(col, TimeColumn)
+                else col.values)
+    if kind == 'value':
+        return node
+    if kind in ('and', 'or'):
+        return (kind, [_bind_query(child, columns) for child in node[1]])
+    if kind == 'unary':
+        return (kind, node[1], _bind_query(node[2], columns))
+    if kind == 'isin':
+        child = _bind_query(node[2], columns)
+        values = node[3]
+        if child[0] == 'array' and child[1].dtype.kind == 'M':
+            values = TimeColumn._as_stamps(values)
+        return (kind, node[1], child, _numpy.array(values))
+    left = _bind_query(node[2], columns)
+    right = _bind_query(node[3], columns)
+    if kind == 'compare':
+        for this, other in [(left, right), (right, left)]:
+            if (this[0] == 'array' and this[1].dtype.kind == 'M' and
+                    other[0] == 'value'):
+                stamp = TimeColumn._as_stamps(other[1])
+                left, right = ((this, ('value', stamp)) if this is left
+                               else (('value', stamp), this))
+    return (kind, node[1], left, right)
+
+def _eval_query(node, start, stop):
+    '''
+    Evaluates a bound plan on the rows start to stop
+    '''
+    kind = node[0]
+    if kind == 'array':
+        return node[1][start:stop]
+    if kind == 'value':
+        return node[1]
+    if kind in ('and', 'or'):
+        combine = _numpy.logical_and if kind == 'and' else _numpy.logical_or
+        result = _eval_query(node[1][0], start, stop)
+        for child in node[1][1:]:
+            result = combine(result, _eval_query(child, start, stop))
+        return result
+    if kind == 'unary':
+        return node[1](_eval_query(node[2], start, stop))
+    if kind == 'isin':
+        return _numpy.isin(_eval_query(node[2], start, stop), node[3],
+                           invert=node[1])
+    return node[1](_eval_query(node[2], start, stop),
+                   _eval_query(node[3], start, stop))
 
 class DataMatrix(object):
     '''
     DataMatrix class
     '''
+    # number of rows shown at the top and bottom of the string
+    # representation (see DataMatrix.to_string)
+    display_head = 30
+    display_tail = 10
+
     def __init__(self, inp=None, names=None):
         '''
         DataMatrix initialization
@@ -946,6 +1909,7 @@ class DataMatrix(object):
                     title = self._letters.next()
                 columns[title] = DataColumn(inp, title=title)
         self.columns = columns
+        self._time_index = None
 
     @property
     def names(self):
@@ -1002,36 +1966,83 @@ class DataMatrix(object):
         '''
         String representation of data column
         '''
-        maxind = len(str(self.nrows))+1
+        return self.to_string()
+
+    def to_string(self, head=None, tail=None):
+        '''
+        Preview of the matrix: the first `head` and last `tail` rows, or all
+        the rows if there are no more than head+tail. When rows are hidden,
+        the column widths are computed from the displayed rows only, so that
+        the cost depends only on the number of displayed rows.
+
+        Args:
+            head (int, optional): number of rows shown at the top. By
+                default, DataMatrix.display_head.
+            tail (int, optional): number of rows shown at the bottom. By
+                default, DataMatrix.display_tail.
+
+        Returns:
+            str
+        '''
+        head = self.display_head if head is None else max(head, 0)
+        tail = self.display_tail if tail is None else max(tail, 0)
+        nrows = self.nrows
+        if head + tail >= nrows:
+            rows = range(nrows)
+        else:
+            rows = range(head) + range(nrows-tail, nrows)
+        maxind = len(str(nrows))+1
         red = '' if not _colorama else _colorama.Fore.RED
         reset_all = '' if not _colorama else _colorama.Style.RESET_ALL
-        the_str = '\n'+' '*maxind+red
         names = self.names
         if 'time' in names:
             names.remove('time')
             names = ['time']+ sorted(names)
         else:
             names = sorted(names)
-        lengths = [max(len(name), self[name].maxlength)+1 for name in names]
-        for j, name in enumerate(names):
-            the_str += '  | {name:>{length}}'.format(name=name, length=lengths[j])
-        the_str += '\n'+'-'*maxind
-        for j, name in enumerate(names):
-            the_str += '--|-{name:->{length}}'.format(name='', length=lengths[j])
-        the_str += reset_all
-        for j, row in enumerate(self):
-            the_str += '\n{0:<{maxind}}'.format(j, maxind=maxind)
-            for k, name in enumerate(names):
-                the_str += ('  '+red+'|'+reset_all+
-                            ' {val:>{length}}').format(val=row[name], length=lengths[k])
-        return the_str
+
+        cells = []
+        for name in names:
+            values = self.columns[name].values
+            size = len(values)
+            cells.append(['{0}'.format(values[j] if j < size else _numpy.nan)
+                          for j in rows])
+        if nrows and len(rows) == nrows:
+            lengths = [max(len(name), self.columns[name].maxlength)+1
+                       for name in names]
+        else:
+            lengths = [max([len(name)]+[len(cell) for cell in column])+1
+                       for name, column in zip(names, cells)]
+
+        separator = '  '+red+'|'+reset_all+' '
+        lines = ['',
+                 ' '*maxind+red+''.join('  | '+name.rjust(length)
+                                        for name, length in zip(names, lengths)),
+                 '-'*maxind+''.join('--|-'+'-'*length for length in lengths)+
+                 reset_all]
+        for k, j in enumerate(rows):
+            lines.append(str(j).ljust(maxind) +
+                         ''.join(separator+column[k].rjust(length)
+                                 for column, length in zip(cells, lengths)))
+        if len(rows) < nrows:
+            lines.insert(3+head, '...'[:maxind].ljust(maxind) +
+                         ''.join(separator+'...'.rjust(length)
+                                 for length in lengths))
+            lines.append('[{0} rows x {1} columns]'.format(nrows, len(names)))
+        return '\n'.join(lines)
 
     def __getitem__(self, index):
         '''
         Gets item from matrix
         '''
         if type(index) in [slice, DataColumn, list, _numpy.ndarray]:
-            return DataMatrix({hdr: col[index] for hdr, col in self.columns.iteritems()})
+            # the selected columns are not copied again (slices are views)
+            matrix = DataMatrix()
+            for hdr, col in self.columns.iteritems():
+                col = col[index]
+                col.title = hdr
+                matrix.columns[hdr] = col
+            return matrix
 
         if index in self.columns:
             return self.column(index)
@@ -1104,6 +2115,378 @@ class DataMatrix(object):
         return {hdr: _numpy.nan if index >= len(col) else col[index]
                 for hdr, col in self.columns.iteritems()}
 
+    def __iter__(self):
+        '''
+        Iterates over the rows (dictionaries, see DataMatrix.row)
+        '''
+        for _, row in self.iterrows():
+            yield row
+
+    def itertuples(self, names=None, chunk=_ROW_CHUNK):
+        '''
+        Generator of rows as tuples. The rows are pulled from the column
+        arrays in batches of `chunk` rows.
+
+        Args:
+            names (list, optional): column names, in the order of the tuple
+                items. By default, DataMatrix.names.
+            chunk (int, optional): number of rows per batch.
+
+        Raises:
+            KeyError (unknown column), ValueError (chunk < 1)
+        '''
+        if chunk < 1:
+            raise ValueError('chunk must be at least 1')
+        if names is None:
+            names = self.names
+        columns = [self.columns[name] for name in names]
+        nrows = self.nrows
+        for start in xrange(0, nrows, chunk):
+            stop = min(start+chunk, nrows)
+            batches = []
+            for col in columns:
+                batch = list(col.values[start:stop])
+                if len(batch) < stop-start:
+                    batch.extend([_numpy.nan]*(stop-start-len(batch)))
+                batches.append(batch)
+            for row in _itertools.izip(*batches):
+                yield row
+
+    def iterrows(self, chunk=_ROW_CHUNK):
+        '''
+        Generator of (index, row) pairs, the rows being dictionaries as
+        returned by DataMatrix.row. The rows are pulled from the column
+        arrays in batches of `chunk` rows.
+
+        Args:
+            chunk (int, optional): number of rows per batch.
+
+        Raises:
+            ValueError (chunk < 1)
+        '''
+        names = self.names
+        for j, row in enumerate(self.itertuples(names, chunk)):
+            yield j, dict(_itertools.izip(names, row))
+
+    def to_records(self, names=None):
+        '''
+        Returns the data as a numpy structured array (one copy of each
+        column). The time column is stored as datetime64 (micro-seconds).
+
+        Args:
+            names (list, optional): column names, in the order of the
+                fields. By default, DataMatrix.names.
+
+        Returns:
+            numpy.ndarray with one field per column
+
+        Raises:
+            KeyError (unknown column), ValueError (columns of different
+            lengths)
+        '''
+        if names is None:
+            names = self.names
+        arrays = []
+        for name in names:
+            col = self.columns[name]
+            arrays.append(col.stamps if isinstance(col, TimeColumn)
+                          else col.values)
+        nrows = self.nrows
+        if any(len(values) != nrows for values in arrays):
+            raise ValueError('All the columns must have the same length')
+        records = _numpy.empty(nrows, dtype=[(str(name), values.dtype)
+                                             for name, values
+                                             in zip(names, arrays)])
+        for name, values in zip(names, arrays):
+            records[str(name)] = values
+        return records
+
+    @staticmethod
+    def from_records(records):
+        '''
+        Builds a DataMatrix from a numpy structured array (one copy of each
+        field). A `time` field (datetime64 or strings) becomes a TimeColumn.
+
+        Args:
+            records (numpy.ndarray): structured array
+
+        Returns:
+            DataMatrix
+
+        Raises:
+            TypeError (not a structured array), ValueError (time field
+            cannot be converted to dates)
+        '''
+        if (not isinstance(records, _numpy.ndarray) or
+                records.dtype.names is None):
+            raise TypeError('from_records needs a numpy structured array')
+        records = records.ravel()
+        columns = []
+        for name in records.dtype.names:
+            values = records[name]
+            if name == 'time' and values.dtype.kind == 'M':
+                col = TimeColumn()._new(values.astype(_STAMP_DTYPE))
+            elif name == 'time':
+                col = TimeColumn(values)
+            elif values.dtype.kind == 'O':
+                col = DataColumn(values, title=name)
+            else:
+                col = _wrap_column(values.copy(), title=name)
+            columns.append(col)
+        return DataMatrix(columns)
+
+    def _sorted_times(self):
+        '''
+        Returns the sorted time index: the order of the rows (None if the
+        time column is already sorted) and the sorted time stamps. The index
+        is built once and rebuilt only when the time column changes.
+
+        Raises:
+            KeyError (no time column)
+        '''
+        if 'time' not in self.columns:
+            raise KeyError('The DataMatrix has no time column')
+        col = self.columns['time']
+        index = self._time_index
+        if index is None or index[0] is not col or index[1] != col._version:
+            stamps = col.stamps
+            if (stamps[1:] >= stamps[:-1]).all():
+                order = None
+            else:
+                order = _numpy.argsort(stamps, kind='mergesort')
+                stamps = stamps[order]
+            index = self._time_index = (col, col._version, order, stamps)
+        return index[2], index[3]
+
+    def resample(self, rule, agg=None):
+        '''
+        Bins the rows into fixed time buckets (aligned on 1970-01-01) and
+        aggregates each bucket with vectorized segment reductions. Only the
+        buckets with rows appear in the result. Sorted matrices are
+        resampled in O(n).
+
+        Args:
+            rule (str, number, datetime.timedelta or numpy.timedelta64):
+                bucket width: a string like '10s', '1min', '500ms', '2h' or
+                '1d', or a number of seconds
+            agg (str or dict, optional): aggregation of every column, or
+                dictionary {column: aggregation} of the columns to keep.
+                Aggregations: 'mean', 'min', 'max', 'sum', 'count', 'first'
+                or 'last'. Default is None ('mean' for all the numeric
+                columns). With a single aggregation, the columns it cannot
+                be applied to are left out: 'mean' and 'sum' need numeric
+                columns, 'min' and 'max' numeric or datetime64 columns. The
+                NaNs are skipped ('count' counts the other values) and a
+                bucket with only NaNs gives NaN.
+
+        Returns:
+            DataMatrix with a time column with the start of the buckets
+
+        Raises:
+            KeyError (no time column or unknown column), ValueError
+        '''
+        def supported(name, func):
+            # mean and sum need numbers, min and max also accept dates
+            kind = self.columns[name].values.dtype.kind
+            return (func in ('count', 'first', 'last') or kind in 'biuf' or
+                    (func in ('min', 'max') and kind == 'M'))
+
+        width = _rule2us(rule)
+        names = [name for name in self.names if name != 'time']
+        if agg is None or isinstance(agg, str):
+            func = agg or 'mean'
+            if func not in _AGGREGATIONS:
+                raise ValueError('Unknown aggregation {0}'.format(func))
+            agg = {name: func for name in names if supported(name, func)}
+        for name, func in agg.iteritems():
+            if func not in _AGGREGATIONS:
+                raise ValueError('Unknown aggregation {0}'.format(func))
+            if name not in self.columns or name == 'time':
+                raise KeyError('Unknown column {0}'.format(name))
+            if not supported(name, func):
+                raise ValueError('Cannot aggregate the non-numeric column '
+                                 '{0} with {1}'.format(name, func))
+        order, stamps = self._sorted_times()
+
+        buckets = stamps.view(_numpy.int64) // width
+        if not len(buckets):
+            starts = _numpy.zeros(0, dtype=int)
+        else:
+            starts = _numpy.flatnonzero(_numpy.r_[True,
+                                                  buckets[1:] != buckets[:-1]])
+        stops = _numpy.r_[starts[1:], len(buckets)].astype(int)
+        cols = [self.columns['time']._new(
+            (buckets[starts]*width).view(_STAMP_DTYPE))]
+        for name in names:
+            if name not in agg:
+                continue
+            func = agg[name]
+            values = self.columns[name].values
+            if order is not None:
+                values = values[order]
+            # the NaNs of float columns are skipped (buckets with only NaNs
+            # give NaN)
+            nan = None
+            if (values.dtype.kind == 'f' and len(starts) and
+                    func not in ('first', 'last')):
+                nan = _numpy.isnan(values)
+                if not nan.any():
+                    nan = None
+            if nan is None:
+                counts = stops - starts
+            else:
+                counts = _numpy.add.reduceat(~nan, starts, dtype=_numpy.int64)
+            if not len(starts):
+                result = values[:0]
+            elif func == 'count':
+                result = counts
+            elif func == 'first':
+                result = values[starts]
+            elif func == 'last':
+                result = values[stops-1]
+            elif func in ('min', 'max'):
+                ufunc = _numpy.minimum if func == 'min' else _numpy.maximum
+                if nan is None:
+                    result = ufunc.reduceat(values, starts)
+                else:
+                    fill = _numpy.inf if func == 'min' else -_numpy.inf
+                    result = ufunc.reduceat(_numpy.where(nan, fill, values),
+                                            starts)
+                    result[counts == 0] = _numpy.nan
+            else:
+                if nan is not None:
+                    values = _numpy.where(nan, 0., values)
+                result = _numpy.add.reduceat(values, starts)
+                if func == 'mean':
+                    result = result/_numpy.maximum(counts, 1).astype(
+                        _numpy.float64)
+                if nan is not None:
+                    result[counts == 0] = _numpy.nan
+            cols.append(_wrap_column(result, title=name))
+        return DataMatrix(cols)
+
+    def _rows(self, order, start, stop):
+        '''
+        Rows start to stop of the sorted time index
+        '''
+        if order is None:
+            return self[start:stop]
+        return self[order[start:stop]]
+
+    def between(self, start=None, end=None):
+        '''
+        Selects the rows with times between start and end (included), with a
+        binary search on the sorted time index.
+
+        Args:
+            start (datetime, str or numpy.datetime64, optional): first time.
+                Default is None (from the first row).
+            end (datetime, str or numpy.datetime64, optional): last time.
+                Default is None (until the last row).
+
+        Returns:
+            DataMatrix with the rows, sorted by time
+
+        Raises:
+            KeyError (no time column), ValueError
+        '''
+        order, stamps = self._sorted_times()
+        first, last = 0, len(stamps)
+        if start is not None:
+            first = _numpy.searchsorted(stamps, TimeColumn._as_stamps(start),
+                                        side='left')
+        if end is not None:
+            last = _numpy.searchsorted(stamps, TimeColumn._as_stamps(end),
+                                       side='right')
+        return self._rows(order, first, max(first, last))
+
+    def at(self, time, method='nearest'):
+        '''
+        Selects the row at a given time, with a binary search on the sorted
+        time index.
+
+        Args:
+            time (datetime, str or numpy.datetime64): the time
+            method (str, optional): 'nearest' (closest row), 'before' (last
+                row at or before time), 'after' (first row at or after time)
+                or 'exact'. Default is 'nearest'.
+
+        Returns:
+            DataMatrix with one row
+
+        Raises:
+            KeyError (no time column or no matching row), ValueError
+        '''
+        if method not in ('nearest', 'before', 'after', 'exact'):
+            raise ValueError('Unknown method {0}'.format(method))
+        order, stamps = self._sorted_times()
+        stamp = TimeColumn._as_stamps(time)
+        index = _numpy.searchsorted(stamps, stamp, side='left')
+        if method == 'before':
+            index = _numpy.searchsorted(stamps, stamp, side='right') - 1
+        elif method == 'nearest' and index > 0:
+            if (index == len(stamps) or
+                    stamp - stamps[index-1] <= stamps[index] - stamp):
+                index -= 1
+        elif method == 'exact':
+            if index == len(stamps) or stamps[index] != stamp:
+                index = -1
+        if index < 0 or index >= len(stamps):
+            raise KeyError('No row at {0}'.format(time))
+        return self._rows(order, index, index+1)
+
+    def query(self, expression, chunk=_QUERY_CHUNK):
+        '''
+        Selects the rows matching a boolean expression, e.g.
+        dm.query("`temp dome` > 15 and status_dome == 'OK'").
+
+        Columns are referred to by name, between backquotes if the name is
+        not an identifier (an identifier with underscores also matches the
+        column with spaces instead). Expressions can use numbers, strings,
+        arithmetic operators, comparisons (also chained), `in` and `not in`
+        lists, and, or, not, &, | and ~. Strings compared to the time
+        column are converted to dates.
+
+        The expression is parsed once (the plans are cached) and evaluated
+        with numpy operations on chunks of rows; the selected rows are then
+        gathered with one copy per column.
+
+        Args:
+            expression (str): the query
+            chunk (int, optional): number of rows evaluated at once.
+
+        Returns:
+            DataMatrix with the selected rows
+
+        Raises:
+            ValueError (invalid query or not a boolean expression),
+            KeyError (unknown column)
+        '''
+        if chunk < 1:
+            raise ValueError('chunk must be at least 1')
+        plan = _bind_query(_compile_query(expression), self.columns)
+        nrows = self.nrows
+        selected = []
+        for start in xrange(0, nrows, chunk):
+            stop = min(start+chunk, nrows)
+            mask = _numpy.asarray(_eval_query(plan, start, stop))
+            if mask.dtype != bool:
+                raise ValueError('The query {0!r} does not evaluate to '
+                                 'booleans'.format(expression))
+            if not mask.ndim:
+                mask = _numpy.repeat(mask, stop-start)
+            selected.append(_numpy.flatnonzero(mask) + start)
+        index = (_numpy.concatenate(selected) if selected
+                 else _numpy.zeros(0, dtype=int))
+        cols = []
+        for col in self.columns.itervalues():
+            if isinstance(col, TimeColumn):
+                cols.append(col[index])
+            else:
+                cols.append(_wrap_column(col.values.take(index),
+                                         title=col.title))
+        return DataMatrix(cols)
+
     def copy(self):
         '''
         Returns a copy of the object
@@ -1142,12 +2525,23 @@ class DataMatrix(object):
                  right_data=None,
                  right_color='r',
                  right_label='',
+                 downsample=None,
                  **kwargs):
         '''
         Plots a data column as a function of time
+
+        With downsample='minmax' (or True) or downsample='lttb', each series
+        is reduced to about 2 to 4 points per pixel of the axis width before
+        plotting, keeping its peaks (minimum and maximum per pixel bucket,
+        or Largest Triangle Three Buckets).
         '''
         if 'time' not in self.columns:
             raise TypeError('This data does not contain a `time` column')
+        if downsample is True:
+            downsample = 'minmax'
+        if downsample and downsample not in _DOWNSAMPLE_METHODS:
+            raise ValueError('Unknown downsampling method '
+                             '{0}'.format(downsample))
 
         if ax is None:
             fig = _plt.figure()
@@ -1186,9 +2580,22 @@ class DataMatrix(object):
             dates = self['time'].date
             timevalues = dates.values
             otherFormat = True
+
+        if downsample:
+            stamps = self['time'].stamps.view(_numpy.int64)
+            npoints = int(ax.get_window_extent().width*2*_DOWNSAMPLE_RATIO)
+
+        def points(values):
+            '''
+            Returns the (downsampled) time values and values to plot
+            '''
+            if not downsample:
+                return timevalues, values
+            index = _downsample(stamps, values, npoints, downsample)
+            return timevalues[index], values[index]
         
         if isinstance(data, AbstractDataColumn):
-            line, = ax.plot(timevalues, data.values, label=data.title,
+            line, = ax.plot(*points(data.values), label=data.title,
                             **kwargs)
         elif isinstance(data, tuple):
         
@@ -1214,7 +2621,7 @@ class DataMatrix(object):
                 if not isinstance(subdata, AbstractDataColumn):
                     raise TypeError("You can only plots DataColumn objects")
                 
-                line, = ax.plot(timevalues, subdata.values,
+                line, = ax.plot(*points(subdata.values),
                                 label=subdata.title,
                                 color=colors[j],
                                 linewidth=linewidths[j],
@@ -1228,7 +2635,7 @@ class DataMatrix(object):
                     raise TypeError("You can only plots DataColumn objects")
                 
                 try:
-                    line, = ax.plot(timevalues, subdata.values,
+                    line, = ax.plot(*points(subdata.values),
                                     label=subdata.title, **kwargs)
                 except ValueError:
                     print ("Warning: data column not plotted "
@@ -1250,7 +2657,7 @@ class DataMatrix(object):
             ax2 = ax.twinx()
             if 'color' in kwargs:
                 kwargs.pop('color')
-            line2, = ax2.plot(timevalues, right_data.values,
+            line2, = ax2.plot(*points(right_data.values),
                               color=right_color, label=right_data.title,
                               **kwargs)
             ax2.set_zorder(0)
@@ -1303,6 +2710,69 @@ class DataMatrix(object):
         with open(filename, 'w') as fil:
             _pickle.dump(self.columns, fil)
 
+    def save_npy(self, dirname):
+        '''
+        Saves DataMatrix to a directory with one binary .npy file per column
+        (two for time columns: strings and datetime64 stamps) and a json
+        header with the names, types, epochs and time formats of the
+        columns. The directory can be read back with read_npy. The column
+        files of a matrix previously saved in the directory are replaced
+        (the files of columns that no longer exist are removed).
+
+        Args:
+            dirname (str): directory name. It is created if needed.
+
+        Raises:
+            TypeError
+        '''
+        if not _os.path.isdir(dirname):
+            _os.makedirs(dirname)
+        # the previous header is removed first, so that a partially
+        # overwritten directory is never read as a complete matrix
+        header_file = _os.path.join(dirname, _NPY_HEADER)
+        if _os.path.exists(header_file):
+            _os.remove(header_file)
+        header = {'version': _NPY_VERSION, 'columns': []}
+        for j, (name, col) in enumerate(self.columns.iteritems()):
+            values = col.values
+            if values.dtype.kind == 'O':
+                raise TypeError('Column {0} of python objects cannot be '
+                                'saved in binary format'.format(name))
+            entry = {'name': name, 'file': 'col{0}.npy'.format(j),
+                     'dtype': values.dtype.str}
+            _numpy.save(_os.path.join(dirname, entry['file']), values)
+            if isinstance(col, TimeColumn):
+                entry['stamps'] = 'col{0}_stamps.npy'.format(j)
+                entry['epoch'] = str(_date2stamp(col.epoch))
+                entry['time_format'] = col.time_format
+                _numpy.save(_os.path.join(dirname, entry['stamps']),
+                            col.stamps)
+            header['columns'].append(entry)
+        # the header is written last, once all the columns are complete
+        with open(header_file, 'w') as fil:
+            _json.dump(header, fil, indent=1)
+        files = set(entry[key] for entry in header['columns']
+                    for key in ('file', 'stamps') if key in entry)
+        for filename in _os.listdir(dirname):
+            if (_re.match(r'^col\d+(_stamps)?\.npy$', filename) and
+                    filename not in files):
+                _os.remove(_os.path.join(dirname, filename))
+
+def _open_data(filename):
+    '''
+    Opens a data file for reading in binary mode. Files ending with .gz are
+    decompressed on the fly.
+
+    Args:
+        filename (str): file name.
+
+    Returns:
+        file object
+    '''
+    if filename.endswith('.gz'):
+        return _gzip.open(filename, 'rb')
+    return open(filename, mode='rb')
+
 def getheader(filename, delimiter=','):
     '''
     Reads the first line of the csv file, split into an array of column
@@ -1317,7 +2787,7 @@ def getheader(filename, delimiter=','):
 
     Raises:
     '''
-    with open(filename, mode='r') as fil:
+    with _open_data(filename) as fil:
         header = fil.readline()
     header = header.strip('\n\r# ')
     fields = header.split(delimiter)
@@ -1340,13 +2810,371 @@ def read_pickle(filename):
         dic = _pickle.load(fil)
     return DataMatrix(dic)
 
+def _load_npy(filename, mmap_mode=None):
+    '''
+    Loads a .npy file (empty arrays cannot be memory-mapped)
+    '''
+    try:
+        return _numpy.load(filename, mmap_mode=mmap_mode)
+    except ValueError:
+        if mmap_mode is None:
+            raise
+        return _numpy.load(filename)
+
+def _minmax_points(x, y, nbuckets):
+    '''
+    Returns the indices of the minimum and maximum of y in each of nbuckets
+    equal intervals of x, plus the first and last points, in order
+    '''
+    x = x.astype(_numpy.float64)
+    span = x[-1] - x[0] or 1.
+    buckets = ((x - x[0])*(nbuckets/span)).astype(_numpy.int64)
+    if (buckets[1:] < buckets[:-1]).any():
+        order = _numpy.lexsort((y, buckets))
+        starts = _numpy.flatnonzero(_numpy.r_[True, _numpy.diff(buckets[order]) != 0])
+        stops = _numpy.r_[starts[1:], len(order)] - 1
+        return _numpy.unique(_numpy.r_[0, order[starts], order[stops], len(x)-1])
+    # Sorted abscissae: the buckets are contiguous segments (O(n))
+    starts = _numpy.flatnonzero(_numpy.r_[True, buckets[1:] != buckets[:-1]])
+    counts = _numpy.diff(_numpy.r_[starts, len(y)])
+    index = [_numpy.array([0, len(y)-1])]
+    for reduction in (_numpy.fmin, _numpy.fmax):
+        extrema = _numpy.repeat(reduction.reduceat(y, starts), counts)
+        matches = _numpy.flatnonzero(y == extrema)
+        pos = _numpy.minimum(_numpy.searchsorted(matches, starts),
+                             len(matches)-1)
+        found = matches[pos] if len(matches) else starts
+        index.append(_numpy.where(found < starts + counts, found, starts))
+    return _numpy.unique(_numpy.concatenate(index))
+
+def _lttb_points(x, y, npoints):
+    '''
+    Returns the indices of the npoints points selected by the Largest
+    Triangle Three Buckets algorithm
+    '''
+    x = x.astype(_numpy.float64)
+    y = y.astype(_numpy.float64)
+    edges = _numpy.linspace(1, len(x)-1, npoints-1).astype(int)
+    edges = _numpy.r_[edges, len(x)]
+    index = _numpy.zeros(npoints, dtype=int)
+    index[-1] = len(x)-1
+    prev = 0
+    for j in xrange(npoints-2):
+        start, stop = edges[j], edges[j+1]
+        xavg = x[stop:edges[j+2]].mean()
+        yavg = y[stop:edges[j+2]].mean()
+        area = _numpy.abs((x[prev] - xavg)*(y[start:stop] - y[prev]) -
+                          (x[prev] - x[start:stop])*(yavg - y[prev]))
+        area[_numpy.isnan(area)] = -1
+        prev = index[j+1] = start + _numpy.argmax(area)
+    return index
+
+def _downsample(x, y, npoints, method='minmax'):
+    '''
+    Returns the indices of the points to plot to reduce a series to about
+    npoints points while preserving its peaks.
+
+    Args:
+        x (numpy.ndarray): sorted abscissae (numeric)
+        y (numpy.ndarray): values
+        npoints (int): number of points to keep
+        method (str, optional): 'minmax' (minimum and maximum of each of
+            npoints/2 buckets) or 'lttb' (Largest Triangle Three Buckets).
+            By default, 'minmax'.
+
+    Returns:
+        numpy.ndarray of indices, or slice(None) if the series is short
+        enough or not numeric
+    '''
+    if len(y) <= max(npoints, 3) or y.dtype.kind not in 'biuf':
+        return slice(None)
+    if method == 'lttb':
+        return _lttb_points(x, y, npoints)
+    return _minmax_points(x, y, max(npoints//2, 1))
+
+def _wrap_column(values, title=''):
+    '''
+    Builds a DataColumn around an array without copying it
+
+    Args:
+        values (numpy.ndarray): the data
+        title (str, optional): column title. By default, ''
+
+    Returns:
+        DataColumn
+    '''
+    col = DataColumn(title=title)
+    col.values = values
+    col.type = values.dtype.type
+    return col
+
+def read_npy(dirname, mmap_mode=None):
+    '''
+    Reads a directory written by DataMatrix.save_npy into a DataMatrix.
+    Only the columns listed in the header are read.
+
+    Args:
+        dirname (str): directory name.
+        mmap_mode (str, optional): memory-map mode of the columns ('r',
+            'r+', 'c', see numpy.load). Defaults to None. If None, the
+            columns are read into memory. Otherwise, opening the matrix is
+            almost instant and the data is read from disk when accessed.
+
+    Returns:
+        DataMatrix with content of the directory
+
+    Raises:
+        ValueError
+    '''
+    with open(_os.path.join(dirname, _NPY_HEADER), 'r') as fil:
+        header = _json.load(fil)
+    if header.get('version') != _NPY_VERSION:
+        raise ValueError('Unknown version of the binary format: '
+                         '{0}'.format(header.get('version')))
+    cols = []
+    for entry in header['columns']:
+        name = entry['name']
+        if isinstance(name, unicode):
+            name = name.encode('utf-8')
+        values = _load_npy(_os.path.join(dirname, entry['file']), mmap_mode)
+        if 'stamps' in entry:
+            stamps = _load_npy(_os.path.join(dirname, entry['stamps']),
+                               mmap_mode)
+            epoch = _numpy.datetime64(entry['epoch']).astype(_dt.datetime)
+            time_format = entry['time_format']
+            if isinstance(time_format, unicode):
+                time_format = time_format.encode('utf-8')
+            col = TimeColumn(epoch=epoch,
+                             time_format=time_format)._new(stamps, values)
+        else:
+            col = _wrap_column(values, title=name)
+        cols.append(col)
+    return DataMatrix(cols)
+
+def _iter_blocks(fil, blocksize=None, replace=None):
+    '''
+    Generator that reads a file in blocks of about blocksize bytes. Each block
+    ends at the end of a line.
+
+    Args:
+        fil (file): file opened in binary mode
+        blocksize (int, optional): number of bytes read at once. Defaults to
+            None. If None, _BLOCK_SIZE.
+        replace (str, optional): multi-character delimiter to replace by
+            _UNIT_SEPARATOR. Defaults to None.
+
+    Returns:
+        numpy arrays of uint8 with the content of the blocks
+    '''
+    if blocksize is None:
+        blocksize = _BLOCK_SIZE
+    rest = b''
+    while True:
+        data = fil.read(blocksize)
+        if not data:
+            data, rest = rest, b''
+            cut = len(data)
+        else:
+            data = rest + data
+            cut = data.rfind(b'\n') + 1
+            rest = data[cut:]
+        if cut:
+            block = data[:cut]
+            if replace:
+                block = block.replace(replace, _UNIT_SEPARATOR)
+            yield _numpy.frombuffer(block, dtype=_numpy.uint8)
+        elif not data:
+            return
+
+def _line_bounds(buf):
+    '''
+    Finds the non-empty lines of a buffer, ignoring the leading and trailing
+    whitespaces of each line.
+
+    Args:
+        buf (numpy.ndarray): buffer of uint8 with complete lines
+
+    Returns:
+        tuple with the arrays of the positions of the first and of the last
+            character of each non-empty line
+    '''
+    newlines = _numpy.flatnonzero(buf == ord('\n'))
+    starts = _numpy.r_[0, newlines+1]
+    stops = _numpy.r_[newlines, len(buf)]
+    blank = _numpy.zeros(len(buf), dtype=bool)
+    for char in ' \t\r\n\x0b\x0c':
+        blank |= buf == ord(char)
+    text = _numpy.flatnonzero(~blank)
+    ifirst = _numpy.searchsorted(text, starts)
+    ilast = _numpy.searchsorted(text, stops) - 1
+    nonempty = ilast >= ifirst
+    return text[ifirst[nonempty]], text[ilast[nonempty]]
+
+def _gather(buf, starts, stops):
+    '''
+    Copies the slices buf[starts[j]:stops[j]] into an array of strings
+
+    Args:
+        buf (numpy.ndarray): buffer of uint8
+        starts (numpy.ndarray): start positions of the strings
+        stops (numpy.ndarray): stop positions of the strings
+
+    Returns:
+        numpy.ndarray of strings
+    '''
+    widths = stops - starts
+    width = max(widths.max(), 1) if len(widths) else 1
+    offsets = _numpy.arange(width)
+    chars = buf[_numpy.minimum(starts[:, None] + offsets, len(buf)-1)]
+    chars[offsets >= widths[:, None]] = 0
+    return chars.view('S{0}'.format(width)).ravel()
+
+def _split_fields(buf, first, last, delimiter, ncols=None):
+    '''
+    Splits lines of a buffer into columns of strings. Lines with a wrong
+    number of fields are ignored.
+
+    Args:
+        buf (numpy.ndarray): buffer of uint8
+        first (numpy.ndarray): positions of the first character of the lines
+        last (numpy.ndarray): positions of the last character of the lines
+        delimiter (str): delimiter. Multi-character delimiters must have
+            been replaced by _UNIT_SEPARATOR in the buffer.
+        ncols (int, optional): number of fields per line. Defaults to None.
+            If None, the most frequent number of fields is used.
+
+    Returns:
+        tuple with the list of arrays of strings (one per column) and the
+            number of columns
+    '''
+    separator = delimiter if len(delimiter) == 1 else _UNIT_SEPARATOR
+    delims = _numpy.flatnonzero(buf == ord(separator))
+    idelim = _numpy.searchsorted(delims, first)
+    counts = _numpy.searchsorted(delims, last, side='right') - idelim + 1
+    if ncols is None:
+        ncols = _numpy.bincount(counts).argmax()
+    for j in _numpy.flatnonzero(counts != ncols):
+        print ('Line ignored (wrong number of fields: '
+               '{0} instead of {1})').format(counts[j], ncols)
+        print buf[first[j]:last[j]+1].tostring().replace(separator, delimiter)
+    good = counts == ncols
+    first, last, idelim = first[good], last[good], idelim[good]
+    pos = delims[idelim[:, None] + _numpy.arange(ncols-1)]
+    starts = _numpy.column_stack([first, pos+1])
+    stops = _numpy.column_stack([pos, last+1])
+    return ([_gather(buf, starts[:, j], stops[:, j]) for j in range(ncols)],
+            ncols)
+
+def _convert_strings(strings, dtype=None):
+    '''
+    Converts an array of strings to integers if possible, else to floats if
+    possible. The type is guessed from a sample of the strings, then the
+    whole array is converted at once.
+
+    Args:
+        strings (numpy.ndarray): array of strings
+        dtype (numpy.dtype, optional): type of a previous chunk of the same
+            column. Only types it can be cast to are tried. Defaults to None.
+
+    Returns:
+        numpy.ndarray of int, float or str
+    '''
+    dtypes = [thetype for thetype in (_numpy.int64, _numpy.float64)
+              if dtype is None or _numpy.can_cast(dtype, thetype)]
+    while dtypes:
+        try:
+            strings[:_SAMPLE_SIZE].astype(dtypes[0])
+            break
+        except (ValueError, OverflowError):
+            dtypes.pop(0)
+    for thetype in dtypes:
+        try:
+            return strings.astype(thetype)
+        except (ValueError, OverflowError):
+            pass
+    return strings
+
+def _csv_fields(filename, names, delimiter, skiplines, field_header):
+    '''
+    Determines the fields of a csv file (see read_csv)
+
+    Returns:
+        tuple with the list of fields, the number of lines to skip and the
+            number of fields per line (None if there is no header)
+    '''
+    if field_header:
+        fields = getheader(filename, delimiter=delimiter)
+        return fields, skiplines + 1, len(fields) or None
+    elif names:
+        return list(names), skiplines, None
+    return [], skiplines, None
+
+def _iter_split(filename, delimiter, skiplines, ncols=None):
+    '''
+    Generator that reads a csv file block by block and splits each block
+    into columns of strings.
+
+    Args:
+        filename (str): file name.
+        delimiter (str): delimiter.
+        skiplines (int): skip the first n non-empty lines.
+        ncols (int, optional): number of fields per line (e.g. from the
+            header). Defaults to None. If None, it is determined from the
+            first block (see _split_fields).
+
+    Returns:
+        lists of numpy arrays of strings (one per column)
+    '''
+    replace = delimiter if len(delimiter) > 1 else None
+    with _open_data(filename) as fil:
+        for buf in _iter_blocks(fil, replace=replace):
+            first, last = _line_bounds(buf)
+            skipped = min(skiplines, len(first))
+            skiplines -= skipped
+            first, last = first[skipped:], last[skipped:]
+            if not len(first):
+                continue
+            columns, ncols = _split_fields(buf, first, last, delimiter, ncols)
+            yield columns
+
+def _make_matrix(fields, columns, time_format=None, dtypes=None):
+    '''
+    Converts columns of strings into a DataMatrix
+
+    Args:
+        fields (list): fields of the csv file. Missing fields are replaced
+            by their index.
+        columns (list of numpy.ndarray): columns of strings
+        time_format (str, optional): format of the time stamps. Defaults to
+            None.
+        dtypes (dict, optional): types of the columns of a previous chunk,
+            updated with the new types. Defaults to None.
+
+    Returns:
+        DataMatrix
+    '''
+    if dtypes is None:
+        dtypes = {}
+    fields = (fields + range(len(fields), len(columns)))[:len(columns)]
+    cols = []
+    for j, (field, strings) in enumerate(zip(fields, columns)):
+        if isinstance(field, str) and field.lower() == 'time':
+            cols.append(TimeColumn(strings, time_format=time_format))
+        else:
+            values = _convert_strings(strings, dtypes.get(j))
+            dtypes[j] = values.dtype
+            title = '' if field == j else field
+            cols.append(DataColumn(values, title=title))
+    return DataMatrix(cols)
+
 def read_csv(filename, names=None, delimiter=',', skiplines=0,
-             field_header=True):
+             field_header=True, time_format=None):
     '''
     Reads the csv file and transfer the content into a DataMatrix.
 
     Args:
-        filename (str): file name.
+        filename (str): file name. Files ending with .gz are decompressed on
+            the fly.
         fields (list of str, optional): list of fields or key for the output
             dictionary. This must have the same number of elements than the
             number of columns in your csv file. Defaults to None. If None, the
@@ -1360,6 +3188,9 @@ def read_csv(filename, names=None, delimiter=',', skiplines=0,
         skiplines (int, optional): Skip the first n lines. Defaults to 0.
         field_header (bool, optional): If True, it uses the first line of the
             file to determine what the fields are. Defaults to False.
+        time_format (str, optional): format of the time stamps in the `time`
+            column (same as for time.strftime). Defaults to None. If None,
+            the format is detected from a sample of the time stamps.
 
     Returns:
         DataMatrix with content of the csv file
@@ -1367,84 +3198,615 @@ def read_csv(filename, names=None, delimiter=',', skiplines=0,
     Raises:
         ValueError, TypeError
     '''
+    fields, skiplines, ncols = _csv_fields(filename, names, delimiter,
+                                           skiplines, field_header)
+    blocks = list(_iter_split(filename, delimiter, skiplines, ncols))
+    if not blocks:
+        return DataMatrix([])
+    columns = [_numpy.concatenate(column) for column in zip(*blocks)]
+    return _make_matrix(fields, columns, time_format)
+
+def iter_csv(filename, chunksize=100000, names=None, delimiter=',',
+             skiplines=0, field_header=True, time_format=None):
+    '''
+    Generator that reads the csv file by chunks of rows. Only one chunk (and
+    one block of the file) is held in memory at a time. All the chunks have
+    the same columns, and can be joined with DataMatrix.append.
 
-    cols = []
-    start = True
-
-    if field_header:
-        fields = getheader(filename, delimiter=delimiter)
-        skiplines += 1
-    elif names:
-        fields = names
-    else:
-        fields = []
-    linecounter = 0
-
-    with open(filename, mode='r') as fil:
-        for line in fil:
-            line = line.strip()
-            if not line:
-                continue
-            row = line.strip('\r\n').split(delimiter)
-            linecounter += 1
-            if linecounter <= skiplines:
-                continue
-            if not start:
-                if len(row) != len(fields):
-                    print ('Line ignored (wrong number of fields: '
-                           '{0} instead of {1})').format(len(row), len(fields))
-                    print line
-                    continue
-            for j, item in enumerate(row):
-                try:
-                    theel = int(item)
-                except ValueError:
-                    try:
-                        theel = float(item)
-                    except ValueError:
-                        theel = item
-                if start:
-                    if j >= len(fields):
-                        fields.append(j)
-                    if (isinstance(fields[j], str)
-                            and fields[j].lower() == 'time'):
-                        fields[j] = fields[j].lower()
-                        cols.append(TimeColumn(theel))
-                    else:
-                        title = fields[j]
-                        if fields[j] == j:
-                            title = ''
-                        cols.append(DataColumn(theel, title=title))
-                else:
-                    cols[j].append(theel)
-            start = False
+    Args:
+        filename (str): file name.
+        chunksize (int, optional): number of rows per chunk. Defaults to
+            100000. The last chunk may be shorter.
+        names, delimiter, skiplines, field_header, time_format: see read_csv
 
-    return DataMatrix(cols)
+    Returns:
+        DataMatrix chunks with content of the csv file
 
-class LoggingError(Exception):
+    Raises:
+        ValueError, TypeError
     '''
-    LoggingError exception
+    if chunksize < 1:
+        raise ValueError('chunksize must be a positive integer')
+    fields, skiplines, ncols = _csv_fields(filename, names, delimiter,
+                                           skiplines, field_header)
+    dtypes = {}
+    pending = []
+    npending = 0
+    for columns in _iter_split(filename, delimiter, skiplines, ncols):
+        pending.append(columns)
+        npending += len(columns[0])
+        if npending < chunksize:
+            continue
+        columns = [_numpy.concatenate(column) for column in zip(*pending)]
+        start = 0
+        while npending - start >= chunksize:
+            yield _make_matrix(fields,
+                               [col[start:start+chunksize] for col in columns],
+                               time_format, dtypes)
+            start += chunksize
+        pending = [[col[start:] for col in columns]]
+        npending -= start
+    if npending:
+        columns = [_numpy.concatenate(column) for column in zip(*pending)]
+        yield _make_matrix(fields, columns, time_format, dtypes)
+
+class MappedCSV(object):
     '''
-    pass
+    Memory-mapped csv file. An index of the offsets of the lines is built
+    when the file is opened, so that any range of rows can be parsed
+    directly from the mapped buffer without reading the file from the start.
 
-class Logger(object):
-    '''
-    Logger class: allows easy logging of timed events or variables
+    Rows are the non-empty lines of the file, after the header and the
+    skipped lines. Rows with a wrong number of fields are ignored when read.
     '''
-    import os
 
-    def __init__(self, fileroot, delimiter=',', logdir='logs', headers=None,
-                 utc=True, timestamp=True, time_format='%Y-%m-%d %H:%M:%S.%f'):
+    def __init__(self, filename, names=None, delimiter=',', skiplines=0,
+                 field_header=True, time_format=None):
         '''
-        Logger initialization:
+        Initialization. Opens and maps the file and builds the line index.
 
         Args:
-            fileroot (str): the root of the file name. For example,
-                if fileroot = 'Blah_', the log files will be similar to
-                Blah_20150403.txt
-
-            delimiter (str, optional): the delimiter between columns in the file.
-                Default is ',' (csv file)
+            filename, names, skiplines, field_header, time_format: see
+                read_csv
+            delimiter (str, optional): Delimiter (single character).
+                Defaults to ','.
+
+        Raises:
+            ValueError
+        '''
+        if len(delimiter) != 1:
+            raise ValueError('MappedCSV needs a single-character delimiter')
+        if filename.endswith('.gz'):
+            raise ValueError('Compressed files cannot be memory-mapped')
+        self.filename = filename
+        self.delimiter = delimiter
+        self.time_format = time_format
+        self.fields, skiplines, self.ncols = _csv_fields(
+            filename, names, delimiter, skiplines, field_header)
+        self._file = open(filename, mode='rb')
+        if _os.fstat(self._file.fileno()).st_size:
+            self._map = _mmap.mmap(self._file.fileno(), 0,
+                                   access=_mmap.ACCESS_READ)
+            self._buffer = _numpy.frombuffer(self._map, dtype=_numpy.uint8)
+        else:
+            self._map = None
+            self._buffer = _numpy.zeros(0, dtype=_numpy.uint8)
+        self._first, self._last = self._index()
+        self._first = self._first[skiplines:]
+        self._last = self._last[skiplines:]
+        if self.ncols is None and len(self._first):
+            line = self._buffer[self._first[0]:self._last[0]+1]
+            self.ncols = int((line == ord(delimiter)).sum()) + 1
+
+    def _index(self):
+        '''
+        Builds the index of the first and last characters of the non-empty
+        lines, one block of the buffer at a time.
+
+        Returns:
+            tuple of two numpy arrays of offsets
+        '''
+        buf = self._buffer
+        size = len(buf)
+        firsts = [_numpy.zeros(0, dtype=int)]
+        lasts = [_numpy.zeros(0, dtype=int)]
+        start = 0
+        while start < size:
+            stop = min(start + _BLOCK_SIZE, size)
+            if stop < size:
+                cut = self._map.rfind(b'\n', start, stop)
+                if cut < 0:
+                    cut = self._map.find(b'\n', stop)
+                stop = size if cut < 0 else cut + 1
+            first, last = _line_bounds(buf[start:stop])
+            firsts.append(first + start)
+            lasts.append(last + start)
+            start = stop
+        return _numpy.concatenate(firsts), _numpy.concatenate(lasts)
+
+    def __len__(self):
+        '''
+        Number of rows in the file
+        '''
+        return len(self._first)
+
+    def __getitem__(self, index):
+        '''
+        Reads a range of rows
+
+        Args:
+            index (slice): range of rows (without step)
+
+        Returns:
+            DataMatrix with the rows
+        '''
+        if not isinstance(index, slice) or index.step not in (None, 1):
+            raise TypeError('MappedCSV can only be indexed by a slice')
+        return self.read(*index.indices(len(self))[:2])
+
+    def read(self, start=0, stop=None):
+        '''
+        Reads the rows from start to stop (excluded) into a DataMatrix
+
+        Args:
+            start (int, optional): first row. Defaults to 0.
+            stop (int, optional): last row (excluded). Defaults to None. If
+                None, reads until the end of the file.
+
+        Returns:
+            DataMatrix with the rows
+        '''
+        if self._buffer is None:
+            raise ValueError('I/O operation on closed file')
+        start, stop = slice(start, stop).indices(len(self))[:2]
+        if stop <= start:
+            return DataMatrix([])
+        first = self._first[start:stop]
+        last = self._last[start:stop]
+        # split block by block to bound the size of the intermediate arrays
+        bounds = _numpy.searchsorted(first, _numpy.arange(
+            first[0], last[-1]+1, _BLOCK_SIZE)[1:])
+        bounds = _numpy.r_[0, bounds, len(first)]
+        blocks = []
+        for ifirst, ilast in zip(bounds[:-1], bounds[1:]):
+            if ifirst == ilast:
+                continue
+            offset = first[ifirst]
+            buf = self._buffer[offset:last[ilast-1]+1]
+            columns, _ = _split_fields(buf, first[ifirst:ilast] - offset,
+                                       last[ifirst:ilast] - offset,
+                                       self.delimiter, self.ncols)
+            blocks.append(columns)
+        columns = [_numpy.concatenate(column) for column in zip(*blocks)]
+        return _make_matrix(self.fields, columns, self.time_format)
+
+    def close(self):
+        '''
+        Closes the mapped file
+        '''
+        self._buffer = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def _concatenate(matrices):
+    '''
+    Concatenates DataMatrix objects with the same columns, allocating each
+    column once.
+
+    Args:
+        matrices (list of DataMatrix): matrices to concatenate
+
+    Returns:
+        DataMatrix
+
+    Raises:
+        ValueError
+    '''
+    names = matrices[0].names
+    for matrix in matrices[1:]:
+        if matrix.names != names:
+            raise ValueError('Cannot concatenate matrices with columns '
+                             '{0} and {1}'.format(names, matrix.names))
+    cols = []
+    for name in names:
+        parts = [matrix[name] for matrix in matrices]
+        values = _numpy.concatenate([part.values for part in parts])
+        if isinstance(parts[0], TimeColumn):
+            stamps = _numpy.concatenate([part.stamps for part in parts])
+            cols.append(parts[0]._new(stamps, values))
+        else:
+            cols.append(_wrap_column(values, title=name))
+    return DataMatrix(cols)
+
+def _log_day(date):
+    '''
+    Converts a date to the day string used in the Logger file names
+
+    Args:
+        date (str, datetime.date or datetime.datetime): a date. Strings must
+            have the format '%Y%m%d'.
+
+    Returns:
+        str with format '%Y%m%d'
+    '''
+    if isinstance(date, _dt.datetime):
+        return (date-_dt.timedelta(hours=12)).strftime('%Y%m%d')
+    if isinstance(date, _dt.date):
+        return date.strftime('%Y%m%d')
+    return _dt.datetime.strptime(date, '%Y%m%d').strftime('%Y%m%d')
+
+def _read_day(args):
+    '''
+    Reads one day file in a worker process (see read_logs). The columns are
+    returned instead of the DataMatrix, which cannot be pickled.
+    '''
+    filename, kwargs = args
+    return read_csv(filename, **kwargs).columns.values()
+
+def read_logs(logdir, fileroot, start=None, end=None, workers=None,
+              **kwargs):
+    '''
+    Reads the daily files written by a Logger in logdir and concatenates them
+    into a single DataMatrix ordered by time. The files are parsed in
+    parallel in a pool of processes.
+
+    Args:
+        logdir (str): name of the log directory (see Logger)
+        fileroot (str): the root of the file names (see Logger)
+        start (str, datetime.date or datetime.datetime, optional): first day
+            or time to read. Defaults to None. Strings must have the format
+            '%Y%m%d'. If a datetime, the rows before start are removed.
+        end (str, datetime.date or datetime.datetime, optional): last day or
+            time to read. Defaults to None. If a datetime, the rows after end
+            are removed.
+        workers (int, optional): number of processes. Defaults to None. If
+            None, the number of CPUs is used.
+        **kwargs: other keyword arguments for read_csv (names, delimiter,
+            skiplines, field_header, time_format)
+
+    Returns:
+        DataMatrix with the content of the files
+
+    Raises:
+        ValueError
+    '''
+    first = None if start is None else _log_day(start)
+    last = None if end is None else _log_day(end)
+    days = sorted(day for day in _os.listdir(logdir)
+                  if _re.match(r'^\d{8}$', day)
+                  and (first is None or day >= first)
+                  and (last is None or day <= last))
+    filenames = [fname for day in days
+                 for _, fname in _day_segments(logdir, fileroot, day)]
+    if not filenames:
+        return DataMatrix([])
+
+    tasks = [(fname, kwargs) for fname in filenames]
+    if workers is None:
+        workers = _multiprocessing.cpu_count()
+    workers = min(workers, len(tasks))
+    if workers > 1:
+        pool = _multiprocessing.Pool(workers)
+        try:
+            matrices = pool.map(_read_day, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        matrices = [_read_day(task) for task in tasks]
+    matrices = [DataMatrix(cols) for cols in matrices
+                if cols and len(cols[0])]
+    if not matrices:
+        return DataMatrix([])
+    result = _concatenate(matrices)
+
+    if 'time' not in result.names:
+        return result
+    times = result['time']
+    stamps = times.stamps
+    keep = None
+    if isinstance(start, _dt.datetime):
+        keep = stamps >= _date2stamp(start)
+    if isinstance(end, _dt.datetime):
+        after = stamps <= _date2stamp(end)
+        keep = after if keep is None else keep & after
+    if keep is not None and not keep.all():
+        result = result[keep]
+        stamps = result['time'].stamps
+    if len(stamps) > 1 and (stamps[1:] < stamps[:-1]).any():
+        order = _numpy.argsort(stamps, kind='mergesort')
+        result = result[order]
+    return result
+
+def read_binary(filename, mmap_mode=None):
+    '''
+    Reads a binary file written by a Logger with binary=True into a
+    DataMatrix. The records are loaded at once (or memory-mapped) and the
+    columns are views on them; nothing is parsed. An incomplete record at
+    the end of the file is ignored.
+
+    Args:
+        filename (str): file name.
+        mmap_mode (str, optional): memory-map mode ('r', 'r+', 'c', see
+            numpy.memmap). Defaults to None. If None, the file is read into
+            memory.
+
+    Returns:
+        DataMatrix with content of the binary file
+
+    Raises:
+        ValueError
+    '''
+    with open(filename, mode='rb') as fil:
+        if fil.read(len(_BINARY_MAGIC)) != _BINARY_MAGIC:
+            raise ValueError('{0} is not a binary log file'.format(filename))
+        length, = _struct.unpack('<q', fil.read(8))
+        header = _json.loads(fil.read(length))
+        if header.get('version') != _BINARY_VERSION:
+            raise ValueError('Unknown version of the binary log format: '
+                             '{0}'.format(header.get('version')))
+        names = [name.encode('utf-8') for name in header['names']]
+        dtype = _numpy.dtype([(name, str(fmt))
+                              for name, fmt in zip(names, header['dtypes'])])
+        offset = fil.tell()
+        nrecords = (_os.fstat(fil.fileno()).st_size - offset) // dtype.itemsize
+        if mmap_mode is None or not nrecords:
+            records = _numpy.fromfile(fil, dtype=dtype, count=nrecords)
+    if mmap_mode is not None and nrecords:
+        records = _numpy.memmap(filename, dtype=dtype, mode=mmap_mode,
+                                offset=offset, shape=(nrecords,))
+    cols = []
+    for name in names:
+        if name == 'time':
+            cols.append(TimeColumn()._new(records[name]))
+        else:
+            cols.append(_wrap_column(records[name], title=name))
+    return DataMatrix(cols)
+
+class TailReader(object):
+    '''
+    Incremental reader of the day files written by a Logger. Each call to
+    update parses only the lines appended since the previous call and
+    appends them to the DataMatrix `matrix`. An incomplete last line is
+    left for the next call. The segments of a day file (see Logger
+    max_bytes) are read in order, compressed or not, and a segment or day
+    file that has disappeared is skipped. When a newer segment or day file
+    appears and the current one has been read to the end, the reader moves
+    to the new file.
+    '''
+
+    def __init__(self, logdir, fileroot, names=None, delimiter=',',
+                 field_header=True, time_format=None, matrix=None):
+        '''
+        Initialization. Starts at the first segment of the most recent day
+        file (nothing is read before the first call to update).
+
+        Args:
+            logdir (str): name of the log directory (see Logger)
+            fileroot (str): the root of the file names (see Logger)
+            names, delimiter, field_header, time_format: see read_csv
+            matrix (DataMatrix, optional): matrix to which the new rows are
+                appended. It must be empty or have the columns of the file.
+                Defaults to None. If None, the matrix is created by the first
+                update that reads rows.
+        '''
+        self.logdir = logdir
+        self.fileroot = fileroot
+        self.delimiter = delimiter
+        self.field_header = field_header
+        self.time_format = time_format
+        self.fields = list(names) if names else []
+        self.matrix = matrix
+        self.day = None
+        self.segment = 0
+        self.offset = 0
+        self._ncols = None
+        self._dtypes = {}
+        days = self._days()
+        if days:
+            self.day = days[-1]
+
+    @property
+    def filename(self):
+        '''
+        filename property: name of the file being read (the current segment
+        of the day file), None if it does not exist
+        '''
+        if self.day is None:
+            return None
+        return dict(self._segments()).get(self.segment)
+
+    def _segments(self):
+        '''
+        Sorted list of the segments of the current day file (see
+        _day_segments)
+        '''
+        return _day_segments(self.logdir, self.fileroot, self.day)
+
+    def _days(self):
+        '''
+        Sorted list of the days that have a file
+        '''
+        if not _os.path.isdir(self.logdir):
+            return []
+        return sorted(day for day in _os.listdir(self.logdir)
+                      if _re.match(r'^\d{8}$', day) and
+                      _day_segments(self.logdir, self.fileroot, day))
+
+    def update(self):
+        '''
+        Reads the new complete lines and appends them to matrix
+
+        Returns:
+            int: number of new rows
+        '''
+        nrows = 0
+        while True:
+            if self.day is None:
+                days = self._days()
+                if not days:
+                    return nrows
+                self.day, self.segment, self.offset = days[0], 0, 0
+            segments = [seg for seg, _ in self._segments()
+                        if seg >= self.segment]
+            if segments and segments[0] > self.segment:
+                # the current segment has disappeared
+                self.segment, self.offset = segments[0], 0
+            nrows += self._read_new()
+            if len(segments) > 1:
+                later = segments[1]
+            else:
+                later = [day for day in self._days() if day > self.day]
+                if not later:
+                    return nrows
+            # lines written to the current file just before the rotation
+            nrows += self._read_new()
+            if len(segments) > 1:
+                self.segment = later
+            else:
+                self.day, self.segment = later[0], 0
+            self.offset = 0
+
+    def _read_new(self):
+        '''
+        Parses the complete lines of the current file after offset
+
+        Returns:
+            int: number of new rows
+        '''
+        filename = self.filename
+        if filename is None:
+            return 0
+        try:
+            fil = _open_data(filename)
+        except IOError:
+            # the segment has been compressed (or removed) in the meantime
+            filename = self.filename
+            if filename is None:
+                return 0
+            fil = _open_data(filename)
+        blocks = []
+        with fil:
+            fil.seek(self.offset)
+            if self.offset == 0 and self.field_header:
+                header = fil.readline()
+                if not header.endswith('\n'):
+                    return 0
+                self.offset = fil.tell()
+                header = header.strip('\n\r# ').split(self.delimiter)
+                self.fields = [field.strip('\'" ') for field in header]
+            for buf in _iter_blocks(fil):
+                if buf[-1] != ord('\n'):
+                    break
+                self.offset += len(buf)
+                if len(self.delimiter) > 1:
+                    buf = _numpy.frombuffer(buf.tostring().replace(
+                        self.delimiter, _UNIT_SEPARATOR), dtype=_numpy.uint8)
+                first, last = _line_bounds(buf)
+                if len(first):
+                    columns, self._ncols = _split_fields(
+                        buf, first, last, self.delimiter, self._ncols)
+                    blocks.append(columns)
+        if not blocks:
+            return 0
+        columns = [_numpy.concatenate(column) for column in zip(*blocks)]
+        if not len(columns[0]):
+            return 0
+        chunk = _make_matrix(self.fields, columns, self.time_format,
+                             self._dtypes)
+        if self.matrix is None:
+            self.matrix = chunk
+        elif not len(self.matrix):
+            for name in chunk.names:
+                self.matrix[name] = chunk[name]
+        else:
+            self.matrix.append(chunk)
+        return len(columns[0])
+
+def _gzip_file(filename):
+    '''
+    Compresses a file to filename.gz and removes it. The compressed file
+    only appears once it is complete.
+
+    Args:
+        filename (str): file name.
+    '''
+    tmp = filename+'.gz.tmp'
+    with open(filename, 'rb') as src:
+        with _gzip.open(tmp, 'wb') as dst:
+            _shutil.copyfileobj(src, dst, _BLOCK_SIZE)
+    _os.rename(tmp, filename+'.gz')
+    _os.remove(filename)
+
+def _day_segments(logdir, fileroot, day, extension='.txt'):
+    '''
+    Finds the segments of a day file written by a Logger: Blah_20150403.txt,
+    Blah_20150403.001.txt, ... and their compressed versions. If a segment
+    exists both compressed and uncompressed (while it is being compressed),
+    the uncompressed file is used.
+
+    Args:
+        logdir (str): name of the log directory
+        fileroot (str): the root of the file names
+        day (str): day with format '%Y%m%d'
+        extension (str, optional): extension of the files. Defaults to
+            '.txt'.
+
+    Returns:
+        sorted list of tuples with the segment numbers and file names
+    '''
+    directory = _os.path.join(logdir, day)
+    if not _os.path.isdir(directory):
+        return []
+    pattern = _re.compile(_re.escape(fileroot+'_'+day) +
+                          r'(?:\.(\d{3,}))?' + _re.escape(extension) +
+                          r'(\.gz)?$')
+    segments = {}
+    for fname in _os.listdir(directory):
+        match = pattern.match(fname)
+        if match is None:
+            continue
+        segment = int(match.group(1) or 0)
+        if match.group(2) and segment in segments:
+            continue
+        segments[segment] = _os.path.join(directory, fname)
+    return sorted(segments.items())
+
+class LoggingError(Exception):
+    '''
+    LoggingError exception
+    '''
+    pass
+
+class Logger(object):
+    '''
+    Logger class: allows easy logging of timed events or variables
+    '''
+    import os
+
+    def __init__(self, fileroot, delimiter=',', logdir='logs', headers=None,
+                 utc=True, timestamp=True, time_format='%Y-%m-%d %H:%M:%S.%f',
+                 buffered=False, buffer_size=1000, flush_interval=1.,
+                 max_bytes=None, compress=False, shared=False, binary=False,
+                 dtypes=None, ring_size=None):
+        '''
+        Logger initialization:
+
+        Args:
+            fileroot (str): the root of the file name. For example,
+                if fileroot = 'Blah_', the log files will be similar to
+                Blah_20150403.txt
+
+            delimiter (str, optional): the delimiter between columns in the file.
+                Default is ',' (csv file)
 
             logdir (str, optional): name of the directory where to save the logs.
                 Default is './logs/'. The logs will then be saved in
@@ -1459,7 +3821,62 @@ class Logger(object):
             time_format (str, optional): format for time stamps.
                 Default is '%Y-%m-%d %H:%M:%S.%f'.
 
-        '''
+            buffered (bool, optional): keep the file open and write the
+                lines by batches? Default is False. Buffered loggers must be
+                closed (or used as context managers).
+
+            buffer_size (int, optional): maximum number of lines kept in
+                memory by a buffered logger. Default is 1000.
+
+            flush_interval (float, optional): age in seconds after which the
+                buffer of a buffered logger is written. Default is 1. A timer
+                (daemon thread) writes the buffer of an idle logger (an
+                AsyncLogger flushes when its queue is idle).
+
+            max_bytes (int, optional): size in bytes after which a buffered
+                logger starts a new segment of the day file:
+                Blah_20150403.001.txt, Blah_20150403.002.txt, ...
+                Default is None (one file per day).
+
+            compress (bool, optional): gzip the finished segments and day
+                files of a buffered logger in a background thread? Default
+                is False.
+
+            shared (bool, optional): several processes write to the same
+                files? Default is False. Shared loggers keep the file open
+                (they must be closed) and append the lines with single
+                writes of at most PIPE_BUF bytes, so that lines of
+                different processes do not interleave. The headers are
+                written under a file lock. If not buffered, each line is
+                written immediately.
+
+            binary (bool, optional): write fixed-width binary records
+                instead of text lines? Default is False. Binary files
+                (Blah_20150403.bin) start with a header describing the
+                columns, followed by one record per call to log, with the
+                time stamp as an int64 number of micro-seconds. They can be
+                read with read_binary. If not buffered, each record is
+                written immediately.
+
+            dtypes (list, optional): types of the columns of a binary
+                logger, one per header: 'f8' (float64), 'i8' (int64) or
+                'M8[us]' (datetime). Default is None (all float64). Also
+                used for the ring buffer: default is float64 for numbers,
+                datetime64 for dates and object otherwise.
+
+            ring_size (int, optional): number of records kept in memory for
+                live queries (see recent). Default is None (no ring buffer).
+
+        Raises:
+            ValueError
+        '''
+        if (max_bytes or compress) and not buffered:
+            raise ValueError('Size rotation and compression need a buffered '
+                             'logger')
+        if shared and (max_bytes or compress):
+            raise ValueError('Shared loggers cannot rotate or compress files')
+        if (shared or binary) and not buffered:
+            buffered, buffer_size = True, 1
         self.fileroot = fileroot
         self.utc = utc
         self.logdir = logdir
@@ -1468,6 +3885,35 @@ class Logger(object):
         self.delimiter = delimiter
         self.time_format = time_format
         self.timestamp = timestamp
+        self.buffered = buffered
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.shared = shared
+        self.binary = binary
+        self._extension = '.bin' if binary else '.txt'
+        self.ring_size = ring_size
+        self._ring_dtypes = dtypes
+        self._ring = None
+        self._ring_record = None
+        self._ring_stamps = None
+        self._ring_count = 0
+        self._ring_lock = _threading.Lock()
+        if binary:
+            self._init_binary(dtypes)
+        self._file = None
+        self._rollover = None
+        self._lines = []
+        self._last_flush = _time.time()
+        # flush timer of an idle buffered logger, and lock of the buffer
+        # against it
+        self._timer = None
+        self._lock = _threading.RLock()
+        self._datestr = None
+        self._segment = 0
+        self._size = 0
+        self._compressions = []
 
     @property
     def datestr(self):
@@ -1487,7 +3933,8 @@ class Logger(object):
         filename property: returns the name of the file given the current date
         '''
         return Logger.os.path.join(self.logdir, self.datestr,
-                                   self.fileroot+'_'+self.datestr+'.txt')
+                                   self.fileroot+'_'+self.datestr+
+                                   self._extension)
 
     def exists(self):
         '''
@@ -1501,7 +3948,12 @@ class Logger(object):
         '''
         path, _ = Logger.os.path.split(self.filename)
         if not Logger.os.path.exists(path):
-            Logger.os.makedirs(path)
+            try:
+                Logger.os.makedirs(path)
+            except OSError:
+                # another process may have created it in the meantime
+                if not Logger.os.path.isdir(path):
+                    raise
 
     def write_headers(self):
         '''
@@ -1529,6 +3981,9 @@ class Logger(object):
         '''
         warning = kwargs.get('warning', False)
         error = kwargs.get('error', False)
+        if self.buffered:
+            self._log_buffered(args, warning, error)
+            return
         if not self.exists():
             self.create_directory()
             self.write_headers()
@@ -1537,10 +3992,119 @@ class Logger(object):
             raise LoggingError(('The number of arguments must match the number '
                                 'of columns in the file ({0} columns, {1} '
                                 'arguments)').format(self.ncols, len(args)))
+        now = _dt.datetime.utcnow() if self.utc else _dt.datetime.now()
+        if self.ring_size:
+            self._remember(now, args)
+        line = self._format(now, args, warning, error)
+        with open(self.filename, 'a') as fil:
+            fil.write(line+'\n')
+
+    def _remember(self, now, args):
+        '''
+        Stores a record in the ring buffer. The buffer is allocated at the
+        first record, with the types of its values if dtypes is None.
+
+        Args:
+            now (datetime.datetime): time stamp of the record
+            args (tuple): data to log
+
+        Raises:
+            LoggingError
+        '''
+        with self._ring_lock:
+            if self._ring is None:
+                dtypes = self._ring_dtypes
+                if dtypes is None:
+                    dtypes = [_numpy.float64
+                              if isinstance(arg, (int, long, float,
+                                                  _numpy.number))
+                              else _STAMP_DTYPE
+                              if isinstance(arg, _dt.datetime)
+                              else object for arg in args]
+                self._ring = [_numpy.zeros(self.ring_size, dtype=dtype)
+                              for dtype in dtypes]
+                # one-record buffer in which the values are converted before
+                # they are copied to the ring
+                self._ring_record = [_numpy.zeros(1, dtype=dtype)
+                                     for dtype in dtypes]
+                self._ring_stamps = _numpy.zeros(self.ring_size,
+                                                 dtype=_numpy.int64)
+            if len(args) != len(self._ring):
+                raise LoggingError('The number of arguments must match the '
+                                   'number of columns of the ring buffer')
+            try:
+                for item, arg in zip(self._ring_record, args):
+                    item[0] = arg
+            except (TypeError, ValueError) as err:
+                raise LoggingError('Cannot store record in ring buffer: '
+                                   '{0}'.format(err))
+            stamp = _date2us(now)
+            j = self._ring_count % self.ring_size
+            for col, item in zip(self._ring, self._ring_record):
+                col[j] = item[0]
+            self._ring_stamps[j] = stamp
+            self._ring_count += 1
+
+    def recent(self, seconds=None, count=None):
+        '''
+        Returns the last records kept in the ring buffer, without reading
+        the file. Only the requested records are copied.
+
+        Args:
+            seconds (float, optional): only the records of the last seconds.
+                Default is None (all the records of the ring buffer).
+            count (int, optional): at most the last count records. Default is
+                None.
+
+        Returns:
+            DataMatrix with a time column and one column per header
+
+        Raises:
+            LoggingError
+        '''
+        if not self.ring_size:
+            raise LoggingError('The logger has no ring buffer')
+        with self._ring_lock:
+            if self._ring is None:
+                return DataMatrix([])
+            size = self.ring_size
+            nrecords = min(self._ring_count, size)
+            start = (self._ring_count - nrecords) % size
+            stamps = self._ring_stamps
+            first = 0
+            if seconds is not None:
+                now = _dt.datetime.utcnow() if self.utc else _dt.datetime.now()
+                cutoff = _date2us(now) - int(seconds*1e6)
+                last = nrecords
+                while first < last:
+                    middle = (first + last)//2
+                    if stamps[(start + middle) % size] < cutoff:
+                        first = middle + 1
+                    else:
+                        last = middle
+            if count is not None:
+                first = max(first, nrecords - count)
+            index = (start + _numpy.arange(first, nrecords)) % size
+            cols = [TimeColumn()._new(stamps[index].view(_STAMP_DTYPE))]
+            titles = self.headers or ['']*len(self._ring)
+            for title, col in zip(titles, self._ring):
+                cols.append(_wrap_column(col[index], title=title))
+        return DataMatrix(cols)
+
+    def _format(self, now, args, warning=False, error=False):
+        '''
+        Formats a line of the log file (without end of line)
+
+        Args:
+            now (datetime.datetime): time stamp of the line
+            args (tuple): data to log
+            warning (bool, optional): adds 'WARNING: ' at the beginning of
+                entry (after timestamp)
+            error (bool, optional): adds 'ERROR: ' at the beginning of entry
+                (after timestamp)
+        '''
         if self.timestamp:
-            timestamp = _dt.datetime.utcnow() if self.utc else _dt.datetime.now()
-            timestamp = timestamp.strftime(self.time_format)
-            line = timestamp+self.delimiter
+            line = now.strftime(self.time_format)+self.delimiter
         else:
             line = ''
         if error:
@@ -1548,5 +4112,516 @@ class Logger(object):
         elif warning:
             line += 'WARNING: '
         line += self.delimiter.join('{0}'.format(arg) for arg in args)
-        with open(self.filename, 'a') as fil:
-            fil.write(line+'\n')
+        return line
+
+    def _log_buffered(self, args, warning, error):
+        '''
+        Logs data to the buffer of a buffered logger (see log)
+        '''
+        if self.ncols and len(args) != self.ncols:
+            raise LoggingError(('The number of arguments must match the number '
+                                'of columns in the file ({0} columns, {1} '
+                                'arguments)').format(self.ncols, len(args)))
+        now = _dt.datetime.utcnow() if self.utc else _dt.datetime.now()
+        if self.ring_size:
+            self._remember(now, args)
+        with self._lock:
+            self._write(now, args, warning, error)
+            if self._lines and self._timer is None:
+                self._timer = _threading.Timer(self.flush_interval,
+                                               self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _timed_flush(self):
+        '''
+        Writes the buffered lines once they are flush_interval old (run by
+        the flush timer)
+        '''
+        with self._lock:
+            if self._timer is not None:
+                Logger.flush(self)
+
+    def _init_binary(self, dtypes):
+        '''
+        Builds the header and the record format of a binary logger
+
+        Args:
+            dtypes (list): types of the columns (see __init__)
+
+        Raises:
+            ValueError
+        '''
+        if dtypes is None:
+            dtypes = ['f8']*len(self.headers)
+        if len(dtypes) != len(self.headers):
+            raise ValueError('The number of dtypes must match the number of '
+                             'headers')
+        names = list(self.headers)
+        dtypes = [_numpy.dtype(dtype).str for dtype in dtypes]
+        if self.timestamp:
+            names.insert(0, 'time')
+            dtypes.insert(0, _numpy.dtype(_STAMP_DTYPE).str)
+        codes = []
+        for dtype in dtypes:
+            if dtype[1:] not in _BINARY_CODES:
+                raise ValueError('Unsupported binary column type '
+                                 '{0}'.format(dtype))
+            codes.append(_BINARY_CODES[dtype[1:]])
+        self._struct = _struct.Struct('<'+''.join(codes))
+        self._dates = [j for j, dtype in enumerate(dtypes)
+                       if dtype[1] == 'M']
+        header = _json.dumps({'version': _BINARY_VERSION, 'names': names,
+                              'dtypes': dtypes})
+        header += ' '*(-len(header) % 8)
+        self._binary_header = (_BINARY_MAGIC + _struct.pack('<q', len(header))
+                               + header)
+
+    def _pack(self, now, args, warning=False, error=False):
+        '''
+        Packs a record of a binary logger
+
+        Args:
+            now (datetime.datetime): time stamp of the record
+            args (tuple): data to log
+
+        Raises:
+            LoggingError
+        '''
+        if warning or error:
+            raise LoggingError('Warnings and errors cannot be logged in '
+                               'binary mode')
+        if self.timestamp:
+            args = (_date2us(now),) + args
+        if self._dates:
+            args = list(args)
+            for j in self._dates:
+                if isinstance(args[j], _dt.datetime):
+                    args[j] = _date2us(args[j])
+        try:
+            return self._struct.pack(*args)
+        except _struct.error as err:
+            raise LoggingError('Cannot pack record: {0}'.format(err))
+
+    def _write(self, now, args, warning=False, error=False):
+        '''
+        Adds a line to the buffer, opening the file of the day if needed, and
+        flushes the buffer when it is full or older than flush_interval
+        (the flush timer of an idle logger is started by _log_buffered).
+        '''
+        if self._file is None or now >= self._rollover:
+            self._open(now)
+        if self.binary:
+            self._lines.append(self._pack(now, args, warning, error))
+        else:
+            self._lines.append(self._format(now, args, warning, error))
+        if (len(self._lines) >= self.buffer_size or
+                _time.time()-self._last_flush >= self.flush_interval):
+            self.flush()
+            if self.max_bytes and self._size >= self.max_bytes:
+                self._close_file(finished=True)
+                self._segment += 1
+                self._open_segment()
+
+    def _open(self, now):
+        '''
+        Opens the file of the day of now, after flushing and closing the file
+        of the previous day. If the day file has several segments, the last
+        one is opened, or a new one if the last one is compressed.
+
+        Args:
+            now (datetime.datetime): current time
+        '''
+        self._close_file(finished=self._datestr is not None)
+        day = now-_dt.timedelta(hours=12)
+        self._datestr = day.strftime('%Y%m%d')
+        segments = _day_segments(self.logdir, self.fileroot, self._datestr,
+                                 self._extension)
+        self._segment = segments[-1][0] if segments else 0
+        if segments and segments[-1][1].endswith('.gz'):
+            self._segment += 1
+        self._open_segment()
+        self._rollover = (_dt.datetime.combine(day.date(), _dt.time(12)) +
+                          _dt.timedelta(days=1))
+
+    def _open_segment(self):
+        '''
+        Opens the current segment of the day file (writing the headers if it
+        is new)
+        '''
+        suffix = '.{0:03d}'.format(self._segment) if self._segment else ''
+        filename = Logger.os.path.join(self.logdir, self._datestr,
+                                       self.fileroot+'_'+self._datestr+
+                                       suffix+self._extension)
+        path, _ = Logger.os.path.split(filename)
+        if not Logger.os.path.exists(path):
+            try:
+                Logger.os.makedirs(path)
+            except OSError:
+                # another process may have created it in the meantime
+                if not Logger.os.path.isdir(path):
+                    raise
+        fil = self._file = open(filename, 'a', 0 if self.shared else -1)
+        if self.shared and _fcntl is not None:
+            _fcntl.flock(fil.fileno(), _fcntl.LOCK_EX)
+        try:
+            self._size = Logger.os.fstat(fil.fileno()).st_size
+            if not self._size and self.binary:
+                self._append(self._binary_header)
+                fil.flush()
+            elif self.binary:
+                self._check_binary_header(filename)
+                self._drop_torn_record()
+            elif not self._size and len(self.headers):
+                hdr = 'time'+self.delimiter if self.timestamp else ''
+                self._append(hdr + self.delimiter.join(self.headers)+'\n')
+                fil.flush()
+        except Exception:
+            self._file = None
+            raise
+        finally:
+            # the lock is released before the file is closed on errors
+            if self.shared and _fcntl is not None:
+                _fcntl.flock(fil.fileno(), _fcntl.LOCK_UN)
+            if self._file is None:
+                fil.close()
+
+    def _check_binary_header(self, filename):
+        '''
+        Checks that an existing binary file has the same columns as the
+        logger
+
+        Raises:
+            LoggingError
+        '''
+        with open(filename, 'rb') as fil:
+            header = fil.read(len(self._binary_header))
+        if header != self._binary_header:
+            raise LoggingError('The columns of {0} do not match the columns '
+                               'of the logger'.format(filename))
+
+    def _drop_torn_record(self):
+        '''
+        Truncates an existing binary file to a whole number of records, so
+        that the records appended after an interrupted write (e.g. a crash)
+        stay aligned
+        '''
+        torn = (self._size-len(self._binary_header)) % self._struct.size
+        if torn:
+            self._size -= torn
+            Logger.os.ftruncate(self._file.fileno(), self._size)
+
+    def _append(self, data):
+        '''
+        Appends data to the open file. Shared loggers write the lines by
+        chunks of at most PIPE_BUF bytes, each chunk with a single system
+        call on a file opened in append mode, so that the chunks of
+        different processes do not interleave (lines longer than PIPE_BUF
+        are written alone).
+
+        Args:
+            data (str): complete lines (or records of a binary logger)
+        '''
+        self._size += len(data)
+        if not self.shared:
+            self._file.write(data)
+            return
+        fileno = self._file.fileno()
+        start = 0
+        while start < len(data):
+            if self.binary:
+                step = self._struct.size
+                stop = start + max(_PIPE_BUF//step, 1)*step
+            else:
+                stop = data.rfind('\n', start, start+_PIPE_BUF) + 1
+            if stop <= start:
+                stop = data.find('\n', start) + 1 or len(data)
+            chunk = data[start:stop]
+            while chunk:
+                chunk = chunk[Logger.os.write(fileno, chunk):]
+            start = stop
+
+    def flush(self):
+        '''
+        Writes the buffered lines to file
+        '''
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._lines and self._file is not None:
+                if self.binary:
+                    self._append(''.join(self._lines))
+                else:
+                    self._append('\n'.join(self._lines)+'\n')
+                self._lines = []
+            if self._file is not None:
+                self._file.flush()
+            self._last_flush = _time.time()
+
+    def _close_file(self, finished=False):
+        '''
+        Flushes the buffered lines and closes the file
+
+        Args:
+            finished (bool, optional): no more lines will be written to the
+                file, which can be compressed. Default is False.
+        '''
+        if self._file is not None:
+            Logger.flush(self)
+            self._file.close()
+            if finished and self.compress:
+                # forget the compressions that are already done
+                self._compressions = [thread for thread in self._compressions
+                                      if thread.is_alive()]
+                thread = _threading.Thread(target=_gzip_file,
+                                           args=(self._file.name,))
+                thread.start()
+                self._compressions.append(thread)
+            self._file = None
+
+    def _join_compressions(self):
+        '''
+        Waits for the background compressions to finish
+        '''
+        while self._compressions:
+            self._compressions.pop().join()
+
+    def close(self):
+        '''
+        Flushes the buffered lines and closes the file. Waits for the
+        background compressions to finish.
+        '''
+        with self._lock:
+            self._close_file()
+        self._join_compressions()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class _Control(object):
+    '''
+    Request sent to the writer thread of an AsyncLogger (flush, sync or
+    stop). Requests are never dropped from the queue.
+    '''
+    def __init__(self, stop=False, sync=False):
+        self.stop = stop
+        self.sync = sync
+        self.done = _threading.Event()
+
+class AsyncLogger(Logger):
+    '''
+    AsyncLogger class: Logger that writes to file in a background thread.
+    log() only takes the time stamp and puts the data on a bounded queue.
+    The writer thread formats the lines and writes them by batches to the
+    day files, like a buffered Logger.
+
+    The data is formatted in the writer thread: do not modify mutable
+    arguments after logging them. Records that cannot be formatted or
+    written are counted in `dropped`, like the records dropped from a full
+    queue. The logger must be closed (or used as a context manager) to write
+    the last lines.
+    '''
+    POLICIES = ('block', 'drop-oldest', 'drop-newest')
+
+    def __init__(self, fileroot, maxsize=10000, policy='block', **kwargs):
+        '''
+        AsyncLogger initialization:
+
+        Args:
+            fileroot (str): the root of the file name (see Logger).
+
+            maxsize (int, optional): maximum number of records in the queue.
+                Default is 10000.
+
+            policy (str, optional): what to do when the queue is full:
+                'block' waits for the writer thread, 'drop-oldest' drops
+                the oldest record of the queue and 'drop-newest' drops the
+                new record. Default is 'block'.
+
+            **kwargs: other arguments of Logger (delimiter, logdir, headers,
+                utc, timestamp, time_format, buffer_size, flush_interval).
+
+        Raises:
+            ValueError
+        '''
+        if policy not in AsyncLogger.POLICIES:
+            raise ValueError('Unknown policy {0}, should be one of '
+                             '{1}'.format(policy, AsyncLogger.POLICIES))
+        kwargs['buffered'] = True
+        Logger.__init__(self, fileroot, **kwargs)
+        self.policy = policy
+        self.dropped = 0
+        self.queued = 0
+        self._counter_lock = _threading.Lock()
+        self._queue = _Queue.Queue(maxsize)
+        self._stopped = False
+        self._thread = _threading.Thread(target=self._run,
+                                         name='AsyncLogger-'+fileroot)
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def pending(self):
+        '''
+        pending property: number of records waiting in the queue
+        '''
+        return self._queue.qsize()
+
+    def log(self, *args, **kwargs):
+        '''
+        Puts data on the queue of records to log
+
+        Args:
+            *args: data to log
+
+            warning (bool, optional): adds 'WARNING: ' at the beginning of entry (after timestamp)
+
+            error (bool, optional): adds 'ERROR: ' at the beginning of entry (after timestamp)
+
+        Raises:
+            LoggingError
+        '''
+        if not self._thread.is_alive():
+            raise LoggingError('The logger is closed')
+        if self.ncols and len(args) != self.ncols:
+            raise LoggingError(('The number of arguments must match the number '
+                                'of columns in the file ({0} columns, {1} '
+                                'arguments)').format(self.ncols, len(args)))
+        now = _dt.datetime.utcnow() if self.utc else _dt.datetime.now()
+        if self.ring_size:
+            self._remember(now, args)
+        record = (now, args, kwargs.get('warning', False),
+                  kwargs.get('error', False))
+        if self.policy == 'block':
+            self._queue.put(record)
+        elif self.policy == 'drop-newest':
+            try:
+                self._queue.put_nowait(record)
+            except _Queue.Full:
+                with self._counter_lock:
+                    self.dropped += 1
+                return
+        else:
+            while True:
+                try:
+                    self._queue.put_nowait(record)
+                    break
+                except _Queue.Full:
+                    pass
+                try:
+                    oldest = self._queue.get_nowait()
+                except _Queue.Empty:
+                    continue
+                if isinstance(oldest, _Control):
+                    self._queue.put(oldest)
+                else:
+                    with self._counter_lock:
+                        self.dropped += 1
+        with self._counter_lock:
+            self.queued += 1
+
+    def _run(self):
+        '''
+        Main loop of the writer thread. A record that cannot be formatted or
+        written is counted as dropped. The file is flushed and closed when
+        the thread stops.
+        '''
+        queue = self._queue
+        timeout = max(self.flush_interval, 0.01)
+        stop = None
+        try:
+            while True:
+                try:
+                    record = queue.get(timeout=timeout)
+                except _Queue.Empty:
+                    if self._lines:
+                        Logger.flush(self)
+                    continue
+                if isinstance(record, _Control):
+                    if record.stop:
+                        stop = record
+                        return
+                    Logger.flush(self)
+                    if record.sync and self._file is not None:
+                        _os.fsync(self._file.fileno())
+                    record.done.set()
+                else:
+                    try:
+                        self._write(*record)
+                    except Exception:
+                        with self._counter_lock:
+                            self.dropped += 1
+        finally:
+            self._stopped = True
+            try:
+                self._close_file()
+            finally:
+                if stop is not None:
+                    stop.done.set()
+                self._release_requests()
+
+    def _release_requests(self):
+        '''
+        Empties the queue of a stopped writer thread: the pending requests
+        are marked as done and the records are counted as dropped
+        '''
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except _Queue.Empty:
+                return
+            if isinstance(record, _Control):
+                record.done.set()
+            else:
+                with self._counter_lock:
+                    self.dropped += 1
+
+    def _request(self, control):
+        '''
+        Sends a request to the writer thread and waits until it is done
+        '''
+        if self._thread.is_alive():
+            self._queue.put(control)
+            while self._thread.is_alive() and not control.done.is_set():
+                control.done.wait(0.1)
+
+    def aflush(self):
+        '''
+        Asks the writer thread to write all the records logged so far and to
+        sync the file to disk, without waiting for it (this only blocks if
+        the queue is full).
+
+        Returns:
+            threading.Event that is set once the records are on disk, or
+            once the writer thread has stopped
+        '''
+        control = _Control(sync=True)
+        if not self._stopped:
+            self._queue.put(control)
+        # the writer thread may have stopped (and emptied the queue) in the
+        # meantime
+        if self._stopped:
+            control.done.set()
+        return control.done
+
+    def flush(self):
+        '''
+        Writes all the records logged so far to file
+        '''
+        if _threading.current_thread() is self._thread:
+            Logger.flush(self)
+        else:
+            self._request(_Control())
+
+    def close(self):
+        '''
+        Writes all the records logged so far, closes the file and stops the
+        writer thread
+        '''
+        self._request(_Control(stop=True))
+        self._thread.join()
+        self._join_compressions()
@@ -5,11 +5,18 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir))
 
+import shutil
+import tempfile
 import unittest as _unittest
 import journal as lg
 datetime = lg._dt
 numpy = lg._numpy
 ROOT = './tests/'
+# directory of the files written by the tests (removed at the end)
+LOGS = tempfile.mkdtemp(prefix='journal_tests_')+'/'
+
+def tearDownModule():
+    shutil.rmtree(LOGS)
 
 class TestDataColumnInit(_unittest.TestCase):
 
@@ -807,6 +814,52 @@ class TestDataAppend(_unittest.TestCase):
         self.assertEqual(len(col), 4)
         self.assertTrue((col.values == [3, 7, 3, 7]).all())
 
+class TestAppendBuffer(_unittest.TestCase):
+
+    def test_spare_capacity(self):
+        col = lg.DataColumn([3, 7])
+        for j in range(100):
+            col.append(j)
+        self.assertEqual(len(col), 102)
+        self.assertEqual(len(col.values), 102)
+        self.assertGreater(len(col._values), 102)
+        self.assertTrue((col.values[2:] == numpy.arange(100)).all())
+
+    def test_buffer_reused(self):
+        col = lg.DataColumn(numpy.arange(3))
+        col.append(3)
+        buf = col._values
+        col.append(4)
+        self.assertIs(col._values, buf)
+
+    def test_time_spare_capacity(self):
+        col = lg.TimeColumn([datetime.datetime(2015,2,1)])
+        for j in range(50):
+            col.append(datetime.datetime(2015,2,2))
+        self.assertEqual(len(col.values), 51)
+        self.assertEqual(len(col.stamps), 51)
+        self.assertEqual(col.date[50], datetime.datetime(2015,2,2))
+
+    def test_time_buffer_reused(self):
+        for col in [lg.TimeColumn([datetime.datetime(2015,2,1)]),
+                    lg.TimeColumn.from_epoch([0., 1.])]:
+            col.append(datetime.datetime(2015,2,2))
+            values, stamps = col._values, col._stamps
+            for j in range(5):
+                col.append(datetime.datetime(2015,2,3))
+                self.assertIs(col._values, values)
+                self.assertIs(col._stamps, stamps)
+            self.assertEqual(col.values[-1], '2015-02-03T00:00:00.000000')
+
+    def test_pickle_trims_buffer(self):
+        import pickle
+        col = lg.DataColumn([3, 7])
+        for j in range(20):
+            col.append(j)
+        col2 = pickle.loads(pickle.dumps(col))
+        self.assertEqual(len(col2._values), 22)
+        self.assertTrue((col2.values == col.values).all())
+
 class TestDataCopy(_unittest.TestCase):
 
     def test_append(self):
@@ -820,6 +873,49 @@ class TestDataCopy(_unittest.TestCase):
         self.assertTrue((col2.values == [3, 7]).all())
         self.assertNotEqual(col, col2)
 
+    def test_views(self):
+        values = numpy.arange(6.)
+        col = lg.DataColumn(values)
+        self.assertTrue(numpy.shares_memory(col.values, values))
+        self.assertFalse(numpy.shares_memory(lg.DataColumn(values, copy=True).values, values))
+        part = col[1:4]
+        self.assertTrue(numpy.shares_memory(part.values, values))
+        part[0] = 10
+        self.assertEqual(col[1], 10)
+        part.append(7)
+        self.assertEqual(list(col.values), [0, 10, 2, 3, 4, 5])
+        self.assertEqual(list(part.values), [10, 2, 3, 7])
+        copied = col.copy()
+        copied[0] = -1
+        self.assertEqual(col[0], 0)
+        dm = lg.DataMatrix([col, lg.DataColumn(numpy.arange(6), title='n')], names=['x', 'n'])
+        rows = dm[2:4]
+        self.assertTrue(numpy.shares_memory(rows['x'].values, values))
+        self.assertEqual(rows['x'].title, 'x')
+        self.assertEqual(list(dm[dm['n'] > 3]['x'].values), [4, 5])
+
+    def test_time_views(self):
+        col = lg.TimeColumn(['2015-01-01 00:00:00', '2015-01-02 00:00:00', '2015-01-03 00:00:00'])
+        part, other = col[0:2], col[1:3]
+        part[1] = '2015-01-05 00:00:00'
+        self.assertEqual(col.values[1], '2015-01-05 00:00:00')
+        self.assertEqual(other.values[0], '2015-01-05 00:00:00')
+        # wider strings through a slice
+        part[0] = '2016-02-02 01:02:03.123456'
+        stamp = numpy.datetime64('2016-02-02T01:02:03.123456')
+        self.assertEqual(col.stamps[0], stamp)
+        for column in [col, part]:
+            self.assertEqual(numpy.datetime64(column.values[0]), stamp)
+        self.assertEqual(numpy.datetime64(other.values[0]), numpy.datetime64('2015-01-05'))
+        other[1] = '2018-01-01 00:00:00'
+        self.assertEqual(col.values[2], '2018-01-01 00:00:00')
+        # wider strings through the column
+        col = lg.TimeColumn(['2015-01-01 00:00:00', '2015-01-02 00:00:00'])
+        part = col[1:]
+        self.assertEqual(part.values[0], '2015-01-02 00:00:00')
+        col[1] = '2017-03-03 01:02:03.123456'
+        self.assertEqual(part.values[0], '2017-03-03 01:02:03.123456')
+
 class TestTimeColumnOperations(_unittest.TestCase):
 
     def test_add(self):
@@ -1088,6 +1184,93 @@ class TestTimeColumnProperties(_unittest.TestCase):
         with self.assertRaises(TypeError):
             col.sum
 
+class TestTimeColumnStamps(_unittest.TestCase):
+
+    def test_stamps(self):
+        col = lg.TimeColumn(['2015-04-17 11:00:13.681000', '22/3/2014'])
+        self.assertEqual(col.stamps.dtype, numpy.dtype('datetime64[us]'))
+        self.assertEqual(col.stamps[0], numpy.datetime64('2015-04-17T11:00:13.681'))
+        self.assertEqual(col.stamps[1], numpy.datetime64('2014-03-22'))
+
+    def test_stamps_follow_items(self):
+        col = lg.TimeColumn([datetime.datetime(2015,2,1), datetime.datetime(2015,1,5)])
+        col[1] = '2015-03-07 10:00'
+        col.append(datetime.datetime(2015,4,3))
+        self.assertEqual(col.stamps[1], numpy.datetime64('2015-03-07T10:00'))
+        self.assertEqual(len(col.stamps), 3)
+        self.assertTrue((col[1:].stamps == col.stamps[1:]).all())
+
+    def test_jd_matches_date2jd(self):
+        dates = [datetime.datetime(1969,12,31,23,59,59,500000),
+                 datetime.datetime(2015,4,17,11,0,13,681000)]
+        col = lg.TimeColumn(dates)
+        for jd, date in zip(col.jd.values, dates):
+            self.assertAlmostEqual(jd, lg._date2jd(date), places=9)
+
+    def test_to_from_jd(self):
+        dates = [datetime.datetime(1969,12,31,23,59,59,500000),
+                 datetime.datetime(2015,4,17,11,0,13,681000),
+                 datetime.datetime(1858,11,17,6)]
+        stamps = numpy.array(dates, dtype='datetime64[us]')
+        jds = lg.to_jd(stamps)
+        self.assertEqual(list(jds), [lg._date2jd(date) for date in dates])
+        self.assertTrue((lg.to_jd(stamps.view(numpy.int64)) == jds).all())
+        # float64 Julian dates are accurate to a few tens of micro-seconds
+        self.assertLess(abs(lg.from_jd(jds) - stamps).max(), numpy.timedelta64(50, 'us'))
+        self.assertEqual(lg.from_jd([2457129.5])[0], numpy.datetime64('2015-04-16T12:00'))
+        self.assertTrue(numpy.isnat(lg.from_jd([numpy.nan])[0]))
+        nat = numpy.array(['2015-04-16T12:00', 'NaT'], dtype='datetime64[us]')
+        self.assertTrue(numpy.isnan(lg.to_jd(nat)[1]))
+        self.assertEqual(lg.to_jd(nat)[0], 2457129.5)
+        self.assertTrue(numpy.isnat(lg.from_jd(lg.to_jd(nat))[1]))
+        col = lg.TimeColumn.from_jd(lg.DataColumn([2457129.5, 2457130.]))
+        self.assertEqual(list(col.day), [16, 17])
+
+    def test_from_epoch(self):
+        col = lg.TimeColumn.from_epoch([0, 1429268413.681234])
+        self.assertEqual(col.stamps[1], numpy.datetime64('2015-04-17T11:00:13.681234'))
+        col = lg.TimeColumn.from_epoch(lg.DataColumn([1.5]), epoch=datetime.datetime(2015, 1, 1))
+        self.assertEqual(col.date[0], datetime.datetime(2015, 1, 1, 0, 0, 1, 500000))
+        self.assertEqual(col.time_from_epoch(86400.25), datetime.datetime(2015, 1, 2, 0, 0, 0, 250000))
+        self.assertEqual(list(col.time_from_epoch([0, 60])),
+                         list(numpy.array(['2015-01-01T00:00', '2015-01-01T00:01'], dtype='datetime64[us]')))
+
+    def test_compare_str(self):
+        col = lg.TimeColumn([datetime.datetime(2015,2,1), datetime.datetime(2015,1,5)])
+        self.assertTrue(((col > '2015-01-20').values == [True, False]).all())
+
+    def test_sub_datetime(self):
+        col = lg.TimeColumn([datetime.datetime(2015,2,1), datetime.datetime(2015,1,5)])
+        diff = col - datetime.datetime(2015,1,5)
+        self.assertEqual(type(diff), lg.DataColumn)
+        self.assertTrue((diff.values == [2332800., 0.]).all())
+
+class TestParseTimes(_unittest.TestCase):
+
+    def test_logger_format(self):
+        strings = numpy.array(['2015-04-17 11:00:13.681000', '2016-02-29 23:59:59.999999'])
+        stamps = lg._parse_times(strings)
+        self.assertEqual(stamps[0], numpy.datetime64('2015-04-17T11:00:13.681'))
+        self.assertEqual(stamps[1], numpy.datetime64('2016-02-29T23:59:59.999999'))
+
+    def test_fallback(self):
+        strings = numpy.array(['2015-04-17 11:00:13.681000', '22/3/2014', '2015-04-17 11:00:13'])
+        stamps = lg._parse_times(strings)
+        self.assertEqual(stamps[1], numpy.datetime64('2014-03-22'))
+        self.assertEqual(stamps[2], numpy.datetime64('2015-04-17T11:00:13'))
+
+    def test_user_format(self):
+        col = lg.TimeColumn(['17/04/2015 11h05', '18/04/2015 12h10'], time_format='%d/%m/%Y %Hh%M')
+        self.assertEqual(col.date[1], datetime.datetime(2015,4,18,12,10))
+
+    def test_invalid_date(self):
+        with self.assertRaises(ValueError):
+            lg._parse_times(numpy.array(['2015-04-17 11:00:13.681000', '2015-02-29 11:00:13.681000']))
+
+    def test_read_csv(self):
+        dm = lg.read_csv(ROOT+'logs_test_hdr.csv', time_format='%Y-%m-%d %H:%M:%S.%f')
+        self.assertEqual(dm['time'].date[0], datetime.datetime(2015,4,17,11,0,13,681000))
+
 class TestTimeAppend(_unittest.TestCase):
 
     def test_append_int(self):
@@ -1263,6 +1446,281 @@ class TestDataMatrixComparisons(_unittest.TestCase):
         self.assertFalse(self.dm == dm2)
         self.assertTrue(self.dm != dm2)
 
+class TestTimeIndex(_unittest.TestCase):
+
+    def setUp(self):
+        times = [datetime.datetime(2015, 4, 3, hour) for hour in [1, 3, 2, 5, 4]]
+        self.dm = lg.DataMatrix([lg.TimeColumn(times), lg.DataColumn(range(5), title='x')])
+
+    def test_between(self):
+        dm = self.dm.between(datetime.datetime(2015, 4, 3, 2), '2015-04-03 04:00:00')
+        self.assertEqual(list(dm['x'].values), [2, 1, 4])
+        self.assertEqual(list(dm['time'].hour), [2, 3, 4])
+        self.assertEqual(self.dm.between(end=datetime.datetime(2015, 4, 3, 1)).nrows, 1)
+        self.assertEqual(self.dm.between(start=datetime.datetime(2015, 4, 4)).nrows, 0)
+        self.assertEqual(self.dm.between().nrows, 5)
+
+    def test_at(self):
+        at = self.dm.at
+        self.assertEqual(at(datetime.datetime(2015, 4, 3, 2, 20))['x'].values[0], 2)
+        self.assertEqual(at(datetime.datetime(2015, 4, 3, 2, 40))['x'].values[0], 1)
+        self.assertEqual(at(datetime.datetime(2015, 4, 3, 2, 40), method='before')['x'].values[0], 2)
+        self.assertEqual(at(datetime.datetime(2015, 4, 3, 2, 20), method='after')['x'].values[0], 1)
+        self.assertEqual(at('2015-04-03 05:00:00', method='exact')['x'].values[0], 3)
+        self.assertEqual(at(datetime.datetime(2015, 4, 4))['x'].values[0], 3)
+        with self.assertRaises(KeyError):
+            at(datetime.datetime(2015, 4, 3, 2, 20), method='exact')
+        with self.assertRaises(KeyError):
+            at(datetime.datetime(2015, 4, 3), method='before')
+        with self.assertRaises(ValueError):
+            at(datetime.datetime(2015, 4, 3), method='closest')
+
+    def test_invalidation(self):
+        self.dm.between()
+        index = self.dm._time_index
+        self.dm.between()
+        self.assertIs(self.dm._time_index, index)
+        self.dm['time'][0] = datetime.datetime(2015, 4, 3, 6)
+        self.assertEqual(list(self.dm.between()['x'].values), [2, 1, 4, 3, 0])
+        self.dm.append(lg.DataMatrix([lg.TimeColumn([datetime.datetime(2015, 4, 3)]),
+                                      lg.DataColumn([5], title='x')]))
+        self.assertEqual(self.dm.at(datetime.datetime(2015, 4, 3))['x'].values[0], 5)
+        with self.assertRaises(KeyError):
+            lg.DataMatrix([lg.DataColumn([1])]).between()
+
+    def test_view_invalidation(self):
+        hour = lambda h, m=0: datetime.datetime(2015, 4, 3, h, m)
+        dm = lg.DataMatrix([lg.TimeColumn([hour(h) for h in range(1, 6)]),
+                            lg.DataColumn(range(5), title='x')])
+        view = dm.between(hour(2), hour(3))
+        self.assertEqual(list(view['x'].values), [1, 2])
+        # writing through the view changes the stamps of dm
+        view['time'][0] = hour(4, 30)
+        self.assertEqual(list(dm.between(hour(3), hour(5))['x'].values), [2, 3, 1, 4])
+        # and writing to dm changes the stamps of the view
+        view = dm[0:3]
+        self.assertEqual(list(view.between()['x'].values), [0, 2, 1])
+        dm['time'][0] = hour(6)
+        self.assertEqual(list(view.between()['x'].values), [2, 1, 0])
+
+class TestResample(_unittest.TestCase):
+
+    def setUp(self):
+        times = [datetime.datetime(2015, 4, 3, 1, minute) for minute in [0, 12, 5, 31, 47, 34]]
+        self.dm = lg.DataMatrix([lg.TimeColumn(times), lg.DataColumn(range(6), title='x'),
+                                 lg.DataColumn(list('abcdef'), title='s')])
+
+    def test_default(self):
+        dm = self.dm.resample('15min')
+        self.assertEqual(sorted(dm.names), ['time', 'x'])
+        self.assertEqual(list(dm['time'].minute), [0, 30, 45])
+        self.assertEqual(list(dm['x'].values), [1., 4., 4.])
+
+    def test_aggregations(self):
+        dm = self.dm.resample(datetime.timedelta(minutes=15),
+                              agg={'x': 'max', 's': 'last'})
+        self.assertEqual(list(dm['x'].values), [2, 5, 4])
+        self.assertEqual(list(dm['s'].values), ['b', 'f', 'e'])
+        expected = {'min': [0, 3, 4], 'sum': [3, 8, 4], 'count': [3, 2, 1], 'first': [0, 3, 4]}
+        for func, values in expected.items():
+            self.assertEqual(list(self.dm.resample(900, agg=func)['x'].values), values)
+        self.assertEqual(self.dm.resample('1h', agg='count')['s'].values[0], 6)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            self.dm.resample('15 fortnights')
+        with self.assertRaises(ValueError):
+            self.dm.resample(0)
+        with self.assertRaises(ValueError):
+            self.dm.resample('1h', agg={'x': 'median'})
+        with self.assertRaises(KeyError):
+            self.dm.resample('1h', agg={'y': 'mean'})
+        with self.assertRaises(ValueError):
+            self.dm.resample('1h', agg='median')
+        with self.assertRaises(ValueError):
+            self.dm.resample('1h', agg={'s': 'mean'})
+        with self.assertRaises(ValueError):
+            self.dm.resample('1h', agg={'s': 'max'})
+
+    def test_nan(self):
+        self.dm['y'] = [1., numpy.nan, 3., numpy.nan, 5., numpy.nan]
+        # buckets: [1, nan, 3], [nan, nan] and [5]
+        expected = {'mean': [2., numpy.nan, 5.], 'sum': [4., numpy.nan, 5.],
+                    'min': [1., numpy.nan, 5.], 'max': [3., numpy.nan, 5.],
+                    'count': [2, 0, 1]}
+        for func, values in expected.items():
+            result = self.dm.resample('15min', agg={'y': func})['y'].values
+            numpy.testing.assert_array_equal(result, values)
+        self.assertEqual(list(self.dm.resample('15min', agg='mean')['x'].values), [1., 4., 4.])
+
+    def test_skip_non_numeric(self):
+        for func in ['mean', 'sum', 'min', 'max']:
+            dm = self.dm.resample('1h', agg=func)
+            self.assertEqual(sorted(dm.names), ['time', 'x'])
+        self.assertEqual(list(self.dm.resample('1h', agg='first')['s'].values), ['a'])
+
+class TestQuery(_unittest.TestCase):
+
+    def setUp(self):
+        self.dm = lg.DataMatrix([lg.TimeColumn(['2015-04-03 01:00:00', '2015-04-03 02:00:00',
+                                                '2015-04-03 03:00:00', '2015-04-03 04:00:00']),
+                                 lg.DataColumn([10., 16., 20., 14.], title='temp dome'),
+                                 lg.DataColumn(['OK', 'OK', 'BAD', 'OK'], title='status dome'),
+                                 lg.DataColumn([1, 2, 3, 4], title='n')])
+
+    def test_query(self):
+        dm = self.dm.query("`temp dome` > 15 and status_dome == 'OK'")
+        self.assertEqual(list(dm['n'].values), [2])
+        self.assertIsInstance(dm['time'], lg.TimeColumn)
+        self.assertEqual(list(dm['time'].hour), [2])
+        self.assertEqual(list(self.dm.query("n % 2 == 0 or not `temp dome` < 20")['n'].values), [2, 3, 4])
+        self.assertEqual(list(self.dm.query("12 < `temp dome` <= 16")['n'].values), [2, 4])
+        self.assertEqual(list(self.dm.query("(status_dome not in ['BAD']) & (n*2 > 3)")['n'].values), [2, 4])
+        self.assertEqual(list(self.dm.query("~(n >= 2)", chunk=3)['n'].values), [1])
+        self.assertEqual(self.dm.query("False").nrows, 0)
+
+    def test_time(self):
+        dm = self.dm.query("time >= '2015-04-03 02:30' and '2015-04-03 04:00:00' > time")
+        self.assertEqual(list(dm['n'].values), [3])
+        dm = self.dm.query("time in ['2015-04-03 01:00:00', '2015-04-03 04:00:00']")
+        self.assertEqual(list(dm['n'].values), [1, 4])
+
+    def test_masks(self):
+        mask = (self.dm['temp dome'] > 15) & (self.dm['status dome'] == 'OK')
+        self.assertEqual(list(self.dm[mask]['n'].values), [2])
+        mask = ~((self.dm['n'] < 2) | (self.dm['n'] > 3))
+        self.assertEqual(list(self.dm[mask]['n'].values), [2, 3])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            self.dm.query("n +")
+        with self.assertRaises(ValueError):
+            self.dm.query("len(n) > 2")
+        with self.assertRaises(ValueError):
+            self.dm.query("n + 1")
+        with self.assertRaises(KeyError):
+            self.dm.query("temperature > 2")
+
+    def test_cache(self):
+        self.dm.query("n > 2")
+        plan = lg._QUERY_CACHE["n > 2"]
+        self.dm.query("n > 2")
+        self.assertIs(lg._QUERY_CACHE["n > 2"], plan)
+
+class TestRows(_unittest.TestCase):
+
+    def setUp(self):
+        self.dm = lg.DataMatrix([lg.TimeColumn(['2015-04-03 01:00:00', '2015-04-03 02:00:00', '2015-04-03 03:00:00']),
+                                 lg.DataColumn([1.5, 2.5, 3.5], title='x'),
+                                 lg.DataColumn(['a', 'b', 'c'], title='s')])
+
+    def test_itertuples(self):
+        rows = list(self.dm.itertuples(['x', 's'], chunk=2))
+        self.assertEqual(rows, [(1.5, 'a'), (2.5, 'b'), (3.5, 'c')])
+        self.assertEqual(len(list(self.dm.itertuples())), 3)
+        with self.assertRaises(ValueError):
+            list(self.dm.itertuples(chunk=0))
+        with self.assertRaises(KeyError):
+            list(self.dm.itertuples(['y']))
+
+    def test_iterrows(self):
+        rows = list(self.dm.iterrows(chunk=1))
+        self.assertEqual([j for j, _ in rows], [0, 1, 2])
+        for j, row in rows:
+            self.assertEqual(row, self.dm.row(j))
+        self.assertEqual(list(self.dm), [row for _, row in rows])
+        self.dm['y'] = [1]
+        self.assertTrue(numpy.isnan(list(self.dm)[2]['y']))
+
+    def test_to_string(self):
+        lines = str(self.dm).splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(lines[1].split('|')[1].strip(), 'time')
+        self.assertEqual(lines[3].split('|')[3].strip(), '1.5')
+        lines = self.dm.to_string(head=1, tail=1).splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(lines[4].split('|')[3].strip(), '...')
+        self.assertEqual(lines[5].split('|')[3].strip(), '3.5')
+        self.assertEqual(lines[6], '[3 rows x 3 columns]')
+        self.assertEqual(len(self.dm.to_string(head=0, tail=0).splitlines()), 5)
+        big = lg.DataMatrix([lg.DataColumn(numpy.arange(1000000), title='n')])
+        self.assertEqual(len(str(big).splitlines()), lg.DataMatrix.display_head+lg.DataMatrix.display_tail+5)
+
+    def test_to_string_widths(self):
+        # without hidden rows, the widths come from DataColumn.maxlength
+        dm = lg.DataMatrix([lg.DataColumn([-100, 5], title='n'),
+                            lg.DataColumn(['a', 'bcd'], title='s')])
+        colorama, lg._colorama = lg._colorama, None
+        try:
+            self.assertEqual(str(dm), '\n    |  n  |    s\n----|-----|-----\n'
+                                      '0   | -100  |    a\n1   |  5  |  bcd')
+        finally:
+            lg._colorama = colorama
+
+    def test_records(self):
+        records = self.dm.to_records(['time', 'x', 's'])
+        self.assertEqual(records.dtype.names, ('time', 'x', 's'))
+        self.assertEqual(records['time'].dtype, numpy.dtype('datetime64[us]'))
+        self.assertEqual(list(records['x']), [1.5, 2.5, 3.5])
+        records['x'][0] = 0
+        self.assertEqual(self.dm['x'][0], 1.5)
+        dm = lg.DataMatrix.from_records(records)
+        self.assertEqual(sorted(dm.names), ['s', 'time', 'x'])
+        self.assertIsInstance(dm['time'], lg.TimeColumn)
+        self.assertEqual(list(dm['time'].hour), [1, 2, 3])
+        self.assertEqual(list(dm['s'].values), ['a', 'b', 'c'])
+        records['x'][1] = 0
+        self.assertEqual(dm['x'][1], 2.5)
+        dm = lg.DataMatrix.from_records(numpy.array([('2015-04-03', 1)], dtype=[('time', 'S10'), ('n', int)]))
+        self.assertEqual(dm['time'].date[0], datetime.datetime(2015, 4, 3))
+        with self.assertRaises(TypeError):
+            lg.DataMatrix.from_records(numpy.arange(3))
+        self.dm['y'] = [1]
+        with self.assertRaises(ValueError):
+            self.dm.to_records()
+
+class TestDownsample(_unittest.TestCase):
+
+    def test_short(self):
+        self.assertEqual(lg._downsample(numpy.arange(10), numpy.arange(10.), 20), slice(None))
+        self.assertEqual(lg._downsample(numpy.arange(100), numpy.array(['a']*100), 20), slice(None))
+
+    def test_peaks(self):
+        x = numpy.arange(100000)
+        y = numpy.sin(x/1000.)
+        y[31415], y[77777] = 10, -10
+        y[500] = numpy.nan
+        for method in ['minmax', 'lttb']:
+            index = lg._downsample(x, y, 200, method)
+            self.assertLessEqual(len(index), 202)
+            self.assertTrue((numpy.diff(index) > 0).all())
+            self.assertIn(31415, index)
+            self.assertIn(77777, index)
+            self.assertEqual(index[0], 0)
+            self.assertEqual(index[-1], 99999)
+        index = lg._downsample(x[::-1], y, 200)
+        self.assertIn(31415, index)
+
+class TestLazyImports(_unittest.TestCase):
+
+    def test_import(self):
+        import subprocess
+        script = ('import sys; sys.path.insert(0, {0!r}); import journal; '
+                  'print(sorted(m for m in ["matplotlib", "dateutil", "colorama"] '
+                  'if m in sys.modules))').format(os.path.join(os.path.dirname(__file__), os.pardir))
+        self.assertEqual(subprocess.check_output([sys.executable, '-c', script]).strip(), '[]')
+
+    def test_lazy_module(self):
+        self.assertTrue(lg._LazyModule('json'))
+        self.assertEqual(lg._LazyModule('json').dumps(1), '1')
+        missing = lg._LazyModule('no_such_module', optional=True)
+        self.assertFalse(missing)
+        with self.assertRaises(AttributeError):
+            missing.Fore
+        with self.assertRaises(ImportError):
+            lg._LazyModule('no_such_module').dumps
+        self.assertEqual(lg.TimeColumn.parser.parse('2015-04-03').day, 3)
+
 class TestReadCSV(_unittest.TestCase):
 
     def test_header(self):
@@ -1315,6 +1773,187 @@ class TestReadCSV(_unittest.TestCase):
         self.assertIn(dm['A'].type, [numpy.int32, numpy.int64])
         self.assertEqual(dm['B'].type, numpy.string_)
 
+    def test_small_blocks(self):
+        blocksize = lg._BLOCK_SIZE
+        lg._BLOCK_SIZE = 64
+        try:
+            small = lg.read_csv(ROOT+'HumTemp_20150417.txt')
+            self.assertGreater(len(list(lg._iter_split(ROOT+'HumTemp_20150417.txt', ',', 1))), 1)
+        finally:
+            lg._BLOCK_SIZE = blocksize
+        dm = lg.read_csv(ROOT+'HumTemp_20150417.txt')
+        self.assertEqual(small.shape, dm.shape)
+        for name in dm.names:
+            self.assertTrue((small[name].values == dm[name].values).all())
+
+    def test_bad_first_row(self):
+        fname = LOGS+'test_bad_first_row.csv'
+        with open(fname, 'w') as fil:
+            fil.write('a,b,c\n1,2\n3,4,5\n6,7,8\n')
+        try:
+            dm = lg.read_csv(fname)
+            with lg.MappedCSV(fname) as mapped:
+                mapped_dm = mapped.read()
+        finally:
+            os.remove(fname)
+        self.assertEqual(dm.shape, (2, 3))
+        self.assertEqual(list(dm['a'].values), [3, 6])
+        self.assertEqual(mapped_dm.shape, (2, 3))
+
+    def test_delimiter(self):
+        fname = LOGS+'test_delimiter.csv'
+        with open(fname, 'w') as fil:
+            fil.write('time::temp::hum\n\n')
+            fil.write('2015-04-17 11:00:13.681000::18.1::22\n')
+            fil.write('  2015-04-17 11:00:57.372000::18.2::1e3  \n')
+            fil.write('2015-04-17 11:01:40.817000::18.2')
+        dm = lg.read_csv(fname, delimiter='::')
+        os.remove(fname)
+        self.assertEqual(dm.shape, (2, 3))
+        self.assertEqual(list(dm['temp'].values), [18.1, 18.2])
+        self.assertEqual(list(dm['hum'].values), [22., 1000.])
+        self.assertEqual(list(dm['time'].microsecond), [681000, 372000])
+
+class TestIterCSV(_unittest.TestCase):
+
+    def test_chunks(self):
+        dm = lg.read_csv(ROOT+'HumTemp_20150417.txt')
+        chunks = list(lg.iter_csv(ROOT+'HumTemp_20150417.txt', chunksize=1000))
+        self.assertEqual([chunk.nrows for chunk in chunks][:-1], [1000]*(len(chunks)-1))
+        self.assertEqual(sum(chunk.nrows for chunk in chunks), dm.nrows)
+        for chunk in chunks:
+            self.assertEqual(chunk.names, dm.names)
+            self.assertIsInstance(chunk['time'], lg.TimeColumn)
+        joined = chunks[0].copy()
+        for chunk in chunks[1:]:
+            joined.append(chunk)
+        for name in dm.names:
+            self.assertTrue((joined[name].values == dm[name].values).all())
+
+    def test_small_blocks(self):
+        blocksize = lg._BLOCK_SIZE
+        lg._BLOCK_SIZE = 100
+        try:
+            chunks = list(lg.iter_csv(ROOT+'logs_test_hdr.csv', chunksize=2))
+            self.assertGreater(len(list(lg._iter_split(ROOT+'logs_test_hdr.csv', ',', 1))), 1)
+        finally:
+            lg._BLOCK_SIZE = blocksize
+        self.assertEqual([chunk.nrows for chunk in chunks], [2, 2, 1])
+        self.assertEqual(chunks[2]['temp'].type, numpy.float64)
+
+    def test_chunk_types(self):
+        fname = LOGS+'test_chunk_types.csv'
+        with open(fname, 'w') as fil:
+            fil.write('a,b\n1,x\n2,y\n3.5,4\n')
+        chunks = list(lg.iter_csv(fname, chunksize=2))
+        os.remove(fname)
+        self.assertIn(chunks[0]['a'].type, [numpy.int32, numpy.int64])
+        self.assertEqual(chunks[1]['a'].type, numpy.float64)
+        self.assertEqual(chunks[1]['b'].type, numpy.string_)
+
+    def test_wrong_chunksize(self):
+        with self.assertRaises(ValueError):
+            list(lg.iter_csv(ROOT+'logs_test_hdr.csv', chunksize=0))
+
+class TestMappedCSV(_unittest.TestCase):
+
+    def test_read(self):
+        dm = lg.read_csv(ROOT+'HumTemp_20150417.txt')
+        with lg.MappedCSV(ROOT+'HumTemp_20150417.txt') as mapped:
+            self.assertEqual(len(mapped), dm.nrows)
+            full = mapped.read()
+        self.assertEqual(full.names, dm.names)
+        self.assertIsInstance(full['time'], lg.TimeColumn)
+        for name in dm.names:
+            self.assertTrue((full[name].values == dm[name].values).all())
+
+    def test_range(self):
+        dm = lg.read_csv(ROOT+'HumTemp_20150417.txt')
+        blocksize = lg._BLOCK_SIZE
+        lg._BLOCK_SIZE = 128
+        try:
+            with lg.MappedCSV(ROOT+'HumTemp_20150417.txt') as mapped:
+                rows = mapped[1000:1100]
+                tail = mapped[-5:]
+        finally:
+            lg._BLOCK_SIZE = blocksize
+        self.assertEqual(rows.nrows, 100)
+        self.assertTrue((rows['time'].values == dm['time'].values[1000:1100]).all())
+        self.assertEqual(tail.nrows, 5)
+
+    def test_wrongline(self):
+        with lg.MappedCSV(ROOT+'logs_test_wrong.csv') as mapped:
+            self.assertEqual(len(mapped), 5)
+            self.assertEqual(mapped.read().shape, (4, 4))
+
+    def test_closed(self):
+        mapped = lg.MappedCSV(ROOT+'logs_test_hdr.csv')
+        mapped.close()
+        with self.assertRaises(ValueError):
+            mapped.read()
+
+class TestReadLogs(_unittest.TestCase):
+
+    def test_read_logs(self):
+        dm = lg.read_logs(ROOT+'logs', 'TestLogHeader_', end='20150422', workers=2)
+        self.assertEqual(dm.shape, (6, 4))
+        self.assertIsInstance(dm['time'], lg.TimeColumn)
+        self.assertTrue((numpy.diff(dm['time'].stamps) >= numpy.timedelta64(0)).all())
+        serial = lg.read_logs(ROOT+'logs', 'TestLogHeader_', end='20150422', workers=1)
+        self.assertTrue((serial['price'].values == dm['price'].values).all())
+
+    def test_start_end(self):
+        dm = lg.read_logs(ROOT+'logs', 'TestLogHeader_', start='20150422', end='20150422')
+        self.assertEqual(dm.nrows, 2)
+        dm = lg.read_logs(ROOT+'logs', 'TestLogHeader_', workers=1,
+                          start=datetime.datetime(2015, 4, 22, 7, 50),
+                          end=datetime.datetime(2015, 4, 22, 18))
+        self.assertEqual(dm.nrows, 4)
+        self.assertEqual(lg.read_logs(ROOT+'logs', 'TestLogHeader_', start='20150101', end='20150102').nrows, 0)
+
+    def test_no_time(self):
+        dm = lg.read_logs(ROOT+'logs', 'TestLogHeaderNoTime_', end='20150422')
+        self.assertEqual(dm.shape, (6, 3))
+
+class TestBinaryFormat(_unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = LOGS+'test_npy'
+        self.dm = lg.read_csv(ROOT+'logs_test_hdr.csv')
+        self.dm.save_npy(self.dirname)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_roundtrip(self):
+        dm = lg.read_npy(self.dirname)
+        self.assertEqual(sorted(dm.names), sorted(self.dm.names))
+        self.assertIsInstance(dm['time'], lg.TimeColumn)
+        for name in dm.names:
+            self.assertEqual(dm[name].type, self.dm[name].type)
+            self.assertTrue((dm[name].values == self.dm[name].values).all())
+        self.assertTrue((dm['time'].stamps == self.dm['time'].stamps).all())
+        self.assertEqual(dm['time'].epoch, self.dm['time'].epoch)
+
+    def test_overwrite(self):
+        lg.DataMatrix([lg.DataColumn([1., 2.], title='x')]).save_npy(self.dirname)
+        dm = lg.read_npy(self.dirname)
+        self.assertEqual(dm.names, ['x'])
+        self.assertEqual(sorted(os.listdir(self.dirname)), ['col0.npy', 'header.json'])
+
+    def test_mmap(self):
+        dm = lg.read_npy(self.dirname, mmap_mode='r')
+        self.assertIsInstance(dm['temp'].values, numpy.memmap)
+        self.assertIsInstance(dm['time'].stamps, numpy.memmap)
+        self.assertTrue((dm['temp'].values == self.dm['temp'].values).all())
+        dm['temp'].append(1.5)
+        self.assertEqual(dm['temp'].values[-1], 1.5)
+
+    def test_objects(self):
+        dm = lg.DataMatrix([lg.DataColumn(numpy.array([None, 1]), title='obj')])
+        with self.assertRaises(TypeError):
+            dm.save_npy(self.dirname)
+
 class TestCreateLog(_unittest.TestCase):
 
     def test_log(self):
@@ -1382,6 +2021,493 @@ class TestCreateLog(_unittest.TestCase):
                 pass
         line = log.delimiter.join(lastline.strip().split(log.delimiter)[1:])
         self.assertEqual(line, '3,4.5,test,2015-04-03 00:00:00')
+
+class TestBufferedLog(_unittest.TestCase):
+
+    def read_lines(self, log):
+        with open(log.filename, 'r') as fil:
+            return [line.strip() for line in fil]
+
+    def test_buffer_size(self):
+        log = lg.Logger(fileroot='TestLogBuffered_', logdir=LOGS,
+                        headers=['count'], buffered=True, buffer_size=3,
+                        flush_interval=3600)
+        nlines = len(self.read_lines(log)) if log.exists() else 0
+        log.log(1)
+        log.log(2)
+        self.assertEqual(len(self.read_lines(log)), max(nlines, 1))
+        log.log(3)
+        lines = self.read_lines(log)
+        self.assertEqual(lines[0], 'time,count')
+        self.assertEqual([line.split(',')[1] for line in lines[-3:]], ['1', '2', '3'])
+        log.log(4)
+        log.close()
+        self.assertEqual(self.read_lines(log)[-1].split(',')[1], '4')
+
+    def test_context_manager(self):
+        with lg.Logger(fileroot='TestLogBuffered_', logdir=LOGS,
+                       buffered=True, flush_interval=3600) as log:
+            log.log('test', warning=True)
+        self.assertEqual(self.read_lines(log)[-1].split(',')[1], 'WARNING: test')
+
+    def test_flush_interval(self):
+        log = lg.Logger(fileroot='TestLogBuffered_', logdir=LOGS,
+                        buffered=True, flush_interval=0)
+        log.log('interval')
+        self.assertEqual(self.read_lines(log)[-1].split(',')[1], 'interval')
+        log.close()
+
+    def test_idle_flush(self):
+        import time
+        log = lg.Logger(fileroot='TestLogBuffered_', logdir=LOGS+'idle',
+                        buffered=True, buffer_size=100, flush_interval=0.1)
+        log.log('idle')
+        self.assertNotIn('idle', ''.join(self.read_lines(log)))
+        time.sleep(0.5)
+        self.assertEqual(self.read_lines(log)[-1].split(',')[1], 'idle')
+        self.assertIsNone(log._timer)
+        log.log('closed')
+        log.close()
+        self.assertIsNone(log._timer)
+        self.assertEqual(self.read_lines(log)[-1].split(',')[1], 'closed')
+
+    def test_rollover(self):
+        log = lg.Logger(fileroot='TestLogBuffered_', logdir=LOGS+'rollover',
+                        buffered=True)
+        log._open(datetime.datetime(2015, 4, 22, 7, 48))
+        self.assertEqual(log._rollover, datetime.datetime(2015, 4, 22, 12))
+        log._open(datetime.datetime(2015, 4, 22, 13))
+        self.assertEqual(log._rollover, datetime.datetime(2015, 4, 23, 12))
+        log.close()
+        self.assertEqual(sorted(os.listdir(LOGS+'rollover')), ['20150421', '20150422'])
+        shutil.rmtree(LOGS+'rollover')
+        with self.assertRaises(lg.LoggingError):
+            lg.Logger(fileroot='TestLogBuffered_', logdir=LOGS,
+                      headers=['a'], buffered=True).log(1, 2)
+
+class TestRotation(_unittest.TestCase):
+
+    def setUp(self):
+        self.logdir = LOGS+'rotation'
+
+    def tearDown(self):
+        shutil.rmtree(self.logdir)
+
+    def test_rotation(self):
+        with lg.Logger(fileroot='TestLogRotation', logdir=self.logdir,
+                       headers=['count'], buffered=True, buffer_size=10,
+                       max_bytes=1000, compress=True) as log:
+            for j in range(300):
+                log.log(j)
+        day = os.listdir(self.logdir)[0]
+        segments = lg._day_segments(self.logdir, 'TestLogRotation', day)
+        self.assertGreater(len(segments), 5)
+        self.assertEqual([seg for seg, _ in segments], range(len(segments)))
+        self.assertTrue(all(fname.endswith('.gz') for _, fname in segments[:-1]))
+        self.assertTrue(segments[-1][1].endswith('.txt'))
+        self.assertEqual(lg.getheader(segments[0][1]), ['time', 'count'])
+        dm = lg.read_csv(segments[0][1])
+        self.assertEqual(list(dm['count'].values[:3]), [0, 1, 2])
+        dm = lg.read_logs(self.logdir, 'TestLogRotation', workers=1)
+        self.assertEqual(list(dm['count'].values), range(300))
+
+    def test_compression_threads(self):
+        log = lg.Logger(fileroot='TestLogRotation', logdir=self.logdir,
+                        headers=['count'], buffered=True, buffer_size=1,
+                        max_bytes=100, compress=True)
+        for j in range(100):
+            log.log(j)
+            self.assertLess(len(log._compressions), 20)
+        log.close()
+        self.assertEqual(log._compressions, [])
+        segments = lg._day_segments(self.logdir, 'TestLogRotation', log._datestr)
+        self.assertTrue(all(fname.endswith('.gz') for _, fname in segments[:-1]))
+
+    def test_reopen(self):
+        log = lg.Logger(fileroot='TestLogRotation', logdir=self.logdir,
+                        headers=['count'], buffered=True, buffer_size=1,
+                        max_bytes=100, compress=True)
+        for j in range(10):
+            log.log(j)
+        log.close()
+        segment = log._segment
+        log.max_bytes = None
+        log.log(10)
+        log.close()
+        self.assertEqual(log._segment, segment)
+        lg._gzip_file(lg._day_segments(self.logdir, 'TestLogRotation', log._datestr)[-1][1])
+        log.log(11)
+        log.close()
+        self.assertEqual(log._segment, segment+1)
+        dm = lg.read_logs(self.logdir, 'TestLogRotation', workers=1)
+        self.assertEqual(list(dm['count'].values), range(12))
+
+    def test_unbuffered(self):
+        with self.assertRaises(ValueError):
+            lg.Logger(fileroot='TestLogRotation', logdir=self.logdir, max_bytes=100)
+        os.makedirs(self.logdir)
+
+def _shared_writer(logdir, nlines):
+    log = lg.Logger(fileroot='TestLogShared', logdir=logdir,
+                    headers=['pid', 'count', 'text'], shared=True)
+    for j in range(nlines):
+        log.log(os.getpid(), j, 'x'*(j % 50))
+    log.close()
+
+class TestSharedLog(_unittest.TestCase):
+
+    def test_processes(self):
+        import multiprocessing
+        logdir = LOGS+'shared'
+        workers = [multiprocessing.Process(target=_shared_writer, args=(logdir, 300))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual([worker.exitcode for worker in workers], [0]*4)
+        day = os.listdir(logdir)[0]
+        with open(os.path.join(logdir, day, 'TestLogShared_'+day+'.txt')) as fil:
+            lines = fil.read().splitlines()
+        shutil.rmtree(logdir)
+        self.assertEqual(lines[0], 'time,pid,count,text')
+        self.assertEqual(len(lines), 1201)
+        counts = {}
+        for line in lines[1:]:
+            _, pid, count, text = line.split(',')
+            self.assertEqual(text, 'x'*(int(count) % 50))
+            counts.setdefault(pid, []).append(int(count))
+        self.assertEqual(sorted(counts.values()), [range(300)]*4)
+
+    def test_long_lines(self):
+        log = lg.Logger(fileroot='TestLogShared', logdir=LOGS,
+                        shared=True, buffered=True, buffer_size=5)
+        for j in range(5):
+            log.log('y'*(lg._PIPE_BUF*j//2))
+        log.close()
+        with open(log.filename) as fil:
+            lines = fil.read().splitlines()
+        self.assertEqual([len(line.split(',')[1]) for line in lines[-5:]],
+                         [lg._PIPE_BUF*j//2 for j in range(5)])
+
+    def test_options(self):
+        with self.assertRaises(ValueError):
+            lg.Logger(fileroot='TestLogShared', logdir=LOGS, shared=True,
+                      buffered=True, max_bytes=100)
+
+class TestBinaryLog(_unittest.TestCase):
+
+    def test_log_read(self):
+        with lg.Logger(fileroot='TestLogBinary', logdir=LOGS,
+                       headers=['temp', 'count', 'date'],
+                       dtypes=['f8', 'i8', 'M8[us]'], binary=True) as log:
+            for j in range(10):
+                log.log(j*0.5, j, datetime.datetime(2015, 4, 3, j))
+        self.assertTrue(log.filename.endswith('.bin'))
+        dm = lg.read_binary(log.filename)
+        self.assertEqual(dm.nrows % 10, 0)
+        self.assertEqual(list(dm['temp'].values[-10:]), [j*0.5 for j in range(10)])
+        self.assertEqual(list(dm['count'].values[-10:]), range(10))
+        self.assertEqual(dm['count'].type, numpy.int64)
+        self.assertEqual(dm['date'].values[-1], numpy.datetime64('2015-04-03T09:00'))
+        self.assertIsInstance(dm['time'], lg.TimeColumn)
+        now = datetime.datetime.utcnow()
+        self.assertLess(abs((dm['time'].date.values[-1] - now).total_seconds()), 60)
+        mapped = lg.read_binary(log.filename, mmap_mode='r')
+        self.assertTrue((mapped['temp'].values == dm['temp'].values).all())
+
+    def test_lazy_time_strings(self):
+        logdir = LOGS+'lazy'
+        with lg.Logger(fileroot='TestLogBinary', logdir=logdir,
+                       headers=['x'], binary=True) as log:
+            for j in range(5):
+                log.log(j)
+        dm = lg.read_binary(log.filename)
+        time = dm['time']
+        self.assertIsNone(time._values)
+        self.assertIsNone(time[1:3]._values)
+        self.assertEqual(list(time.values),
+                         list(numpy.datetime_as_string(time.stamps, unit='us')))
+        time.append(time[:2])
+        self.assertEqual(len(time.values), 7)
+        self.assertEqual(time.values[5], time.values[0])
+
+    def test_partial_record(self):
+        fname = LOGS+'test_partial.bin'
+        log = lg.Logger(fileroot='TestLogBinary', headers=['x'], binary=True,
+                        timestamp=False)
+        with open(fname, 'wb') as fil:
+            fil.write(log._binary_header + log._pack(None, (1.5,)) + '\x00'*3)
+        dm = lg.read_binary(fname)
+        os.remove(fname)
+        self.assertEqual(dm.names, ['x'])
+        self.assertEqual(list(dm['x'].values), [1.5])
+
+    def test_append_after_partial_record(self):
+        logdir = LOGS+'partial'
+        log = lg.Logger(fileroot='TestLogBinary', logdir=logdir,
+                        headers=['x'], binary=True)
+        log.log(1.5)
+        log.close()
+        with open(log.filename, 'ab') as fil:
+            fil.write('\x00'*3)
+        log.log(2.5)
+        log.close()
+        dm = lg.read_binary(log.filename)
+        self.assertEqual(list(dm['x'].values), [1.5, 2.5])
+
+    def test_shared_header_mismatch(self):
+        logdir = LOGS+'mismatch'
+        log = lg.Logger(fileroot='TestLogBinary', logdir=logdir,
+                        headers=['x'], binary=True, shared=True)
+        log.log(1.)
+        log.close()
+        log = lg.Logger(fileroot='TestLogBinary', logdir=logdir,
+                        headers=['x', 'y'], binary=True, shared=True)
+        with self.assertRaises(lg.LoggingError):
+            log.log(1., 2.)
+        self.assertIsNone(log._file)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            lg.Logger(fileroot='TestLogBinary', headers=['x'], binary=True, dtypes=['S3'])
+        with self.assertRaises(ValueError):
+            lg.read_binary(ROOT+'logs_test_hdr.csv')
+        log = lg.Logger(fileroot='TestLogBinaryErrors', logdir=LOGS,
+                        headers=['x'], binary=True)
+        with self.assertRaises(lg.LoggingError):
+            log.log('text')
+        with self.assertRaises(lg.LoggingError):
+            log.log(1., error=True)
+        log.close()
+        log = lg.Logger(fileroot='TestLogBinaryErrors', logdir=LOGS,
+                        headers=['x', 'y'], binary=True)
+        with self.assertRaises(lg.LoggingError):
+            log.log(1., 2.)
+
+class TestRingBuffer(_unittest.TestCase):
+
+    def test_recent(self):
+        with lg.Logger(fileroot='TestLogRing', logdir=LOGS, headers=['x', 'status'],
+                       buffered=True, ring_size=5) as log:
+            self.assertEqual(log.recent().shape, (0, 0))
+            for j in range(8):
+                log.log(j, 'ok')
+            dm = log.recent()
+            self.assertEqual(list(dm['x'].values), [3., 4., 5., 6., 7.])
+            self.assertEqual(list(dm['status'].values), ['ok']*5)
+            self.assertIsInstance(dm['time'], lg.TimeColumn)
+            self.assertTrue((numpy.diff(dm['time'].stamps) >= numpy.timedelta64(0)).all())
+            self.assertEqual(list(log.recent(count=2)['x'].values), [6., 7.])
+            self.assertEqual(log.recent(seconds=60).nrows, 5)
+            log._ring_stamps -= 10**8
+            log.log(8, 'new')
+            self.assertEqual(list(log.recent(seconds=60)['x'].values), [8.])
+            dm['x'][0] = -1
+            self.assertEqual(log.recent()['x'].values[0], 4)
+
+    def test_dtypes(self):
+        log = lg.Logger(fileroot='TestLogRing', logdir=LOGS, ring_size=3,
+                        dtypes=['i8', 'M8[us]'])
+        log.log(3, datetime.datetime(2015, 4, 3))
+        dm = log.recent()
+        self.assertEqual(dm['A'].type, numpy.int64)
+        self.assertEqual(dm['B'].values[0], numpy.datetime64('2015-04-03'))
+        with self.assertRaises(lg.LoggingError):
+            log.log('a', datetime.datetime(2015, 4, 3))
+        for j in range(2):
+            log.log(4+j, datetime.datetime(2015, 4, 4+j))
+        with self.assertRaises(lg.LoggingError):
+            log.log(6, 'b')
+        dm = log.recent()
+        self.assertEqual(list(dm['A'].values), [3, 4, 5])
+        self.assertEqual(dm['B'].values[0], numpy.datetime64('2015-04-03'))
+        with self.assertRaises(lg.LoggingError):
+            lg.Logger(fileroot='TestLogRing', logdir=LOGS).recent()
+
+class TestTailReader(_unittest.TestCase):
+
+    def setUp(self):
+        self.logdir = LOGS+'tail'
+        for day in ['20150421', '20150422']:
+            os.makedirs(os.path.join(self.logdir, day))
+
+    def tearDown(self):
+        shutil.rmtree(self.logdir)
+
+    def write(self, day, text, suffix=''):
+        fname = os.path.join(self.logdir, day, 'TestTail_'+day+suffix+'.txt')
+        with open(fname, 'a') as fil:
+            fil.write(text)
+        return fname
+
+    def test_tail(self):
+        self.write('20150421', 'time,temp,status\n2015-04-21 13:00:00.000000,18.5,OK\n')
+        reader = lg.TailReader(self.logdir, 'TestTail')
+        self.assertEqual(reader.day, '20150421')
+        self.assertEqual(reader.update(), 1)
+        self.write('20150421', '2015-04-21 14:00:00.000000,19,OK\n2015-04-21 15:00')
+        self.assertEqual(reader.update(), 1)
+        self.assertEqual(reader.update(), 0)
+        self.write('20150421', ':00.000000,20,OK\n')
+        self.assertEqual(reader.update(), 1)
+        dm = reader.matrix
+        self.assertEqual(dm.shape, (3, 3))
+        self.assertEqual(list(dm['temp'].values), [18.5, 19., 20.])
+        self.assertEqual(list(dm['time'].hour), [13, 14, 15])
+
+    def test_rollover(self):
+        self.write('20150421', 'time,temp\n2015-04-21 13:00:00.000000,1\n')
+        reader = lg.TailReader(self.logdir, 'TestTail')
+        reader.update()
+        self.write('20150421', '2015-04-22 11:00:00.000000,2\n')
+        self.write('20150422', 'time,temp\n2015-04-22 12:00:00.000000,3\n')
+        self.assertEqual(reader.update(), 2)
+        self.assertEqual(reader.day, '20150422')
+        self.assertEqual(list(reader.matrix['temp'].values), [1, 2, 3])
+        self.assertIsInstance(reader.matrix['time'], lg.TimeColumn)
+
+    def test_segments(self):
+        fname = self.write('20150421', 'time,temp\n2015-04-21 13:00:00.000000,1\n')
+        reader = lg.TailReader(self.logdir, 'TestTail')
+        self.assertEqual(reader.update(), 1)
+        self.write('20150421', '2015-04-21 14:00:00.000000,2\n')
+        lg._gzip_file(fname)
+        self.write('20150421', 'time,temp\n2015-04-21 15:00:00.000000,3\n', '.001')
+        self.assertEqual(reader.update(), 2)
+        self.assertEqual(reader.segment, 1)
+        self.assertTrue(reader.filename.endswith('.001.txt'))
+        shutil.rmtree(os.path.join(self.logdir, '20150421'))
+        self.write('20150422', 'time,temp\n2015-04-22 12:00:00.000000,4\n')
+        self.assertEqual(reader.update(), 1)
+        self.assertEqual((reader.day, reader.segment), ('20150422', 0))
+        self.assertEqual(list(reader.matrix['temp'].values), [1, 2, 3, 4])
+
+    def test_compressed_logger(self):
+        with lg.Logger(fileroot='TestTail', logdir=self.logdir, headers=['count'],
+                       buffered=True, buffer_size=1, max_bytes=100,
+                       compress=True) as log:
+            reader = lg.TailReader(self.logdir, 'TestTail')
+            for j in range(20):
+                log.log(j)
+                reader.update()
+        reader.update()
+        self.assertEqual(list(reader.matrix['count'].values), range(20))
+
+    def test_target_matrix(self):
+        matrix = lg.DataMatrix([])
+        self.write('20150421', 'time,temp\n2015-04-21 13:00:00.000000,1\n')
+        reader = lg.TailReader(self.logdir, 'TestTail', matrix=matrix)
+        self.assertEqual(reader.update(), 1)
+        self.write('20150421', '2015-04-21 14:00:00.000000,2\n')
+        self.assertEqual(reader.update(), 1)
+        self.assertIs(reader.matrix, matrix)
+        self.assertEqual(list(matrix['temp'].values), [1, 2])
+
+    def test_no_file(self):
+        reader = lg.TailReader(self.logdir, 'TestTail', field_header=False)
+        self.assertEqual(reader.update(), 0)
+        self.assertIsNone(reader.matrix)
+        self.write('20150422', 'a;;1\n')
+        reader.delimiter = ';;'
+        self.assertEqual(reader.update(), 1)
+        self.assertEqual(list(reader.matrix['B'].values), [1])
+
+class _StalledLogger(lg.AsyncLogger):
+
+    def __init__(self, *args, **kwargs):
+        import threading
+        self.release = threading.Event()
+        lg.AsyncLogger.__init__(self, *args, **kwargs)
+
+    def _write(self, *args):
+        self.release.wait()
+        lg.AsyncLogger._write(self, *args)
+
+class TestAsyncLog(_unittest.TestCase):
+
+    def last_values(self, log, nlines):
+        with open(log.filename, 'r') as fil:
+            lines = [line.strip() for line in fil]
+        return [line.split(',')[1] for line in lines[-nlines:]]
+
+    def test_log(self):
+        with lg.AsyncLogger(fileroot='TestLogAsync_', logdir=LOGS) as log:
+            for j in range(100):
+                log.log(j)
+            log.flush()
+            self.assertEqual(log.pending, 0)
+            self.assertEqual(self.last_values(log, 100), [str(j) for j in range(100)])
+            log.log('test', error=True)
+        self.assertEqual(self.last_values(log, 1), ['ERROR: test'])
+        self.assertEqual((log.queued, log.dropped), (101, 0))
+        with self.assertRaises(lg.LoggingError):
+            log.log('closed')
+
+    def test_bad_record(self):
+        logdir = LOGS+'bad_record'
+        log = lg.AsyncLogger(fileroot='TestLogAsyncBad', logdir=logdir,
+                             binary=True, headers=['x'])
+        log.log(1.5)
+        log.log('oops')
+        log.log(2.5)
+        log.close()
+        self.assertEqual(log.dropped, 1)
+        dm = lg.read_binary(log.filename)
+        self.assertEqual(list(dm['x'].values), [1.5, 2.5])
+
+    def test_aflush(self):
+        log = _StalledLogger(fileroot='TestLogAsync_', logdir=LOGS)
+        log.log('aflush')
+        done = log.aflush()
+        self.assertFalse(done.is_set())
+        log.release.set()
+        self.assertTrue(done.wait(5))
+        self.assertEqual(self.last_values(log, 1), ['aflush'])
+        log.close()
+        self.assertTrue(log.aflush().is_set())
+
+    def test_aflush_after_close(self):
+        import threading, time
+        log = _StalledLogger(fileroot='TestLogAsync_', logdir=LOGS)
+        log.log('stalled')
+        while log.pending:
+            time.sleep(0.01)
+        closing = threading.Thread(target=log.close)
+        closing.start()
+        while log.pending < 1:
+            time.sleep(0.01)
+        done = log.aflush()
+        log.release.set()
+        closing.join()
+        self.assertTrue(done.wait(5))
+
+    def test_drop_newest(self):
+        log = _StalledLogger(fileroot='TestLogAsync_', logdir=LOGS,
+                             maxsize=2, policy='drop-newest')
+        for j in range(6):
+            log.log(j)
+        log.release.set()
+        log.close()
+        self.assertEqual(log.dropped, 6 - log.queued)
+        self.assertGreaterEqual(log.dropped, 3)
+        self.assertEqual(self.last_values(log, log.queued), [str(j) for j in range(log.queued)])
+
+    def test_drop_oldest(self):
+        log = _StalledLogger(fileroot='TestLogAsync_', logdir=LOGS,
+                             maxsize=2, policy='drop-oldest')
+        for j in range(6):
+            log.log(j)
+        log.release.set()
+        log.close()
+        self.assertEqual(log.queued, 6)
+        self.assertGreaterEqual(log.dropped, 3)
+        self.assertEqual(self.last_values(log, 2), ['4', '5'])
+
+    def test_policy(self):
+        with self.assertRaises(ValueError):
+            lg.AsyncLogger(fileroot='TestLogAsync_', logdir=LOGS, policy='wait')
+
 ## Plots
 ##
 ## dm = lg.read_csv('HumTemp_20150417.txt')
@@ -122,3 +122,17 @@ class TestTimeplot(_unittest.TestCase):
                            right_color='b',
                            )
         plt.savefig('tests/plots/two_axes_2.png')
+
+    def test_downsample(self):
+        for method in ['minmax', 'lttb']:
+            axes, lines = self.data.timeplot(self.data['temp enclosure'],
+                                             right_data=self.data['hum enclosure'],
+                                             downsample=method)
+            width = axes[0].get_window_extent().width
+            for line, col in zip(lines, ['temp enclosure', 'hum enclosure']):
+                self.assertLessEqual(len(line.get_ydata()), 4*width+2)
+                self.assertEqual(max(line.get_ydata()), self.data[col].values.max())
+                self.assertEqual(min(line.get_ydata()), self.data[col].values.min())
+            plt.savefig('tests/plots/downsample_{0}.png'.format(method))
+        with self.assertRaises(ValueError):
+            self.data.timeplot(self.data['temp enclosure'], downsample='median')